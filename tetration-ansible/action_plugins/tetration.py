@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+'''
+Action plugin running the tetration modules inside the Ansible worker process.
+
+The tetration modules only talk to the Tetration API, so when a task runs on
+the controller (delegate_to: localhost or connection: local) there is no need
+to package the module with AnsiballZ, copy it and start a new interpreter for
+every task and loop item. The module is imported once per worker process and
+its main() is called with the task arguments; the RestClient built by
+module_utils is kept for the following loop items of the same task.
+
+Every tetration_* file in this directory is a link to this one. Tasks running
+on a remote host, asynchronous tasks and tasks setting an environment are
+executed the usual way. Set TETRATION_IN_PROCESS=false to disable the plugin.
+
+A module reads its arguments from basic._ANSIBLE_ARGS and writes its result
+to sys.stdout, both global to the process, so modules are run one at a time
+per process.
+'''
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+import os
+import sys
+import threading
+import traceback
+
+import ansible.module_utils
+from ansible import constants as C
+from ansible.module_utils import basic
+from ansible.module_utils._text import to_bytes, to_native, to_text
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.module_utils.six import StringIO
+from ansible.plugins.action import ActionBase
+from ansible.utils.vars import merge_hash
+from ansible.vars.clean import remove_internal_keys
+
+# modules already imported by this worker process, by path
+_MODULES = dict()
+# held while a module runs with the global arguments and stdout swapped
+_RUN_LOCK = threading.Lock()
+
+
+def _load_source(name, path):
+    try:
+        from importlib.util import spec_from_file_location, module_from_spec
+    except ImportError:
+        # Python 2, where imp is still available
+        import imp
+        return imp.load_source(name, path)
+    spec = spec_from_file_location(name, path)
+    module = module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_module(name, path):
+    ''' Imports a module file once, making the module_utils directories of
+    ansible.cfg importable as ansible.module_utils first
+    '''
+    if path not in _MODULES:
+        for module_utils_path in C.DEFAULT_MODULE_UTILS_PATH or []:
+            if module_utils_path not in ansible.module_utils.__path__:
+                ansible.module_utils.__path__.append(module_utils_path)
+        _MODULES[path] = _load_source('ansible_tetration_action_%s' % name, path)
+    return _MODULES[path]
+
+
+class ActionModule(ActionBase):
+
+    def _in_process(self):
+        if not boolean(os.environ.get('TETRATION_IN_PROCESS', True), strict=False):
+            return False
+        if self._task.async_val or any(self._task.environment or []):
+            return False
+        return self._connection.transport == 'local'
+
+    def _execute_in_process(self, task_vars):
+        module_name = self._task.action
+        module_path = self._shared_loader_obj.module_loader.find_plugin(module_name, '.py')
+        module_args = self._task.args.copy()
+        self._update_module_args(module_name, module_args, task_vars)
+
+        stdout = StringIO()
+        res = dict(rc=0, stderr=u'')
+        with _RUN_LOCK:
+            real_stdout = sys.stdout
+            try:
+                module = load_module(module_name, module_path)
+                basic._ANSIBLE_ARGS = to_bytes(json.dumps(dict(ANSIBLE_MODULE_ARGS=module_args)))
+                sys.stdout = stdout
+                module.main()
+            except SystemExit as exc:
+                res['rc'] = exc.code or 0
+            except Exception as exc:
+                res['rc'] = 1
+                res['stderr'] = to_text(traceback.format_exc())
+                stdout.write(to_native(json.dumps(dict(
+                    failed=True,
+                    msg='%s running %s in process: %s' % (type(exc).__name__, module_name, to_text(exc))
+                ))))
+            finally:
+                sys.stdout = real_stdout
+                basic._ANSIBLE_ARGS = None
+        res['stdout'] = to_text(stdout.getvalue())
+
+        data = self._parse_returned_data(res)
+        remove_internal_keys(data)
+        return data
+
+    def run(self, tmp=None, task_vars=None):
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp  # tmp no longer has any effect
+
+        if self._in_process():
+            return merge_hash(result, self._execute_in_process(task_vars))
+
+        wrap_async = self._task.async_val and not self._connection.has_native_async
+        result = merge_hash(result, self._execute_module(task_vars=task_vars, wrap_async=wrap_async))
+        if not wrap_async:
+            # remove a temporary path we created
+            self._remove_tmp_path(self._connection._shell.tmpdir)
+        return result
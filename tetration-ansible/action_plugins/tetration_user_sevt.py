@@ -0,0 +1 @@
+tetration.py
\ No newline at end of file
@@ -73,6 +73,57 @@ options:
             variable.
         type: str
         default: v1
+      worker_socket:
+        description:
+          - Path of the Unix socket of a running C(tetration-api-worker). When the
+            socket exists, API calls are forwarded to the worker, which keeps warm
+            clients and connections across tasks
+          - Value can also be specified using C(TETRATION_WORKER_SOCKET) environment
+            variable.
+        type: str
+      compress_requests:
+        description:
+          - Send request bodies larger than 1KB gzip compressed, which only works
+            with clusters accepting C(Content-Encoding: gzip). Responses are always
+            requested with gzip or deflate transfer encoding
+          - Value can also be specified using C(TETRATION_COMPRESS_REQUESTS) environment
+            variable.
+        type: bool
+        default: 'no'
+      http_cache_dir:
+        description:
+          - Directory where the responses of the API collections read by the module
+            are kept with their C(ETag) and C(Last-Modified) validators. Later reads,
+            including the parallel reads of the bulk modules, send conditional
+            requests and reuse the cached document when the server answers 304, or
+            when the body downloaded has not changed
+          - Not to be confused with the C(cache_dir) option of M(tetration_application),
+            which keeps application details per published version
+          - Value can also be specified using C(TETRATION_HTTP_CACHE_DIR) environment
+            variable.
+        type: path
+      http_cache_size:
+        description:
+          - Maximum size of I(http_cache_dir) in MB. The least recently used
+            responses are removed when it is exceeded
+          - Value can also be specified using C(TETRATION_HTTP_CACHE_SIZE) environment
+            variable.
+        type: int
+        default: 256
+      snapshot:
+        description:
+          - Path of a snapshot written by M(tetration_snapshot_export). Reads are
+            answered from the snapshot instead of the cluster, so a playbook run in
+            check mode produces its change plan without any API call
+          - Outside check mode, each write first reads the object it changes from
+            the cluster and fails with code 412 if it differs from the snapshot.
+            Collections, paths missing from the snapshot and objects written
+            during the run are read live. The objects written are listed in a
+            file named after the snapshot with a C(.written) suffix, shared by
+            every task of the run
+          - Value can also be specified using C(TETRATION_SNAPSHOT) environment
+            variable.
+        type: path
 notes:
   - "This module must be run locally, which can be achieved by specifying C(connection: local)."
   - Please read the :ref:`tetration_guide` for more detailed information on how to use Tetration with Ansible.
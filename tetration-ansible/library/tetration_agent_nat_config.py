@@ -151,9 +151,6 @@ from ansible.module_utils.tetration.api import TetrationApiModule
 from ansible.module_utils.tetration.api import TETRATION_API_AGENT_NAT_CONFIG
 from ansible.module_utils.tetration.api import TETRATION_API_TENANT
 
-from ansible.utils.display import Display
-display = Display()
-
 def main():
     tetration_spec=dict(
         src_subnet=dict(type='str', required=False),
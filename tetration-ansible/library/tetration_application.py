@@ -51,6 +51,17 @@ options:
     - Require one of [C(app_scope_name), C(app_scope_id), C(app_id)]
     - Mutually exclusive to C(app_scope_id)
     type: string
+  cache_dir:
+    description:
+    - Local directory used to cache application details when I(query_level=details)
+    - Details are cached per application id, C(latest_adm_version) and content of
+      the application in the application list, and reused until a new version is
+      published or the name, description, primary flag or enforcement state
+      change, so only the application list is retrieved for unchanged
+      applications
+    - Unlike the I(http_cache_dir) provider option, which revalidates every read
+      with the cluster, cached details are used without any request
+    type: path
   description:
     description: User specified description of the application
     type: string
@@ -117,6 +128,18 @@ tetration_application:
       host: "tetration-cluster@company.com"
       api_key: 1234567890QWERTY
       api_secret: 1234567890QWERTY
+
+# Query details for all applications of a tenant, reusing cached versions
+tetration_application:
+    app_scope_name: ACME
+    query_type: tenant
+    query_level: details
+    cache_dir: ~/.tetration/cache
+    state: query
+    provider:
+      host: "tetration-cluster@company.com"
+      api_key: 1234567890QWERTY
+      api_secret: 1234567890QWERTY
 '''
 
 RETURN = r'''
@@ -187,12 +210,51 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.tetration.api import TetrationApiModule
 from ansible.module_utils.tetration.api import TETRATION_API_APPLICATIONS
 from ansible.module_utils.tetration.api import TETRATION_API_SCOPES
-
-from ansible.utils.display import Display
-display = Display()
+from ansible.module_utils.tetration.cache import TetrationFileCache
+from ansible.module_utils.tetration.cache import document_hash
 
 from time import sleep
 
+def get_application_details(tet_module, applications, cache_dir=None):
+    ''' Returns the details of every application in the list
+    The policies of an application version never change, but its name,
+    description, primary flag and enforcement state do without a new version.
+    So when cache_dir is set details are read from the cache keyed by
+    application id, latest_adm_version and a hash of the application as listed,
+    and only the missing ones are fetched, in parallel.
+    '''
+    cache = None
+    if cache_dir:
+        cache = TetrationFileCache(cache_dir, namespace=getattr(tet_module.rc, 'server_endpoint', ''))
+    app_details = [None] * len(applications)
+    missing = []
+    for idx, application in enumerate(applications):
+        version = application.get('latest_adm_version')
+        if cache and version is not None:
+            app_details[idx] = cache.get('application_details', application['id'], version, document_hash(application))
+        if app_details[idx] is None:
+            missing.append(idx)
+
+    responses = tet_module.run_method_batch([
+        dict(
+            method_name = 'get',
+            target = '%s/%s/details' % (TETRATION_API_APPLICATIONS, applications[idx]['id'])
+        ) for idx in missing
+    ])
+    for idx, response in zip(missing, responses):
+        application = applications[idx]
+        if not response['ok']:
+            tet_module.module.fail_json(
+                msg='Unable to retrieve details for application: %s' % application['id'],
+                code=response['status_code'],
+                operation='get'
+            )
+        app_details[idx] = response['json']
+        version = application.get('latest_adm_version')
+        if cache and version is not None:
+            cache.set(response['json'], 'application_details', application['id'], version, document_hash(application))
+    return app_details
+
 def main():
     tetration_spec=dict(
         app_name=dict(type='str', required=False),
@@ -205,7 +267,8 @@ def main():
         primary=dict(type='bool', required=False, default=True),
         force=dict(type='bool', required=False, default=False),
         query_type=dict(type='str', required=False, choices=['single', 'scope', 'tenant'], default='single'),
-        query_level=dict(type='str', choices=['top', 'details'], default='top')
+        query_level=dict(type='str', choices=['top', 'details'], default='top'),
+        cache_dir=dict(type='path', required=False),
     )
 
     argument_spec = dict(
@@ -248,6 +311,7 @@ def main():
     force = module.params['force']
     query_type = module.params['query_type']
     query_level = module.params['query_level']
+    cache_dir = module.params['cache_dir']
     existing_app = None
     existing_app_scope = None
 
@@ -390,15 +454,7 @@ def main():
             if applications:
                 applications = [ valid_item for valid_item in applications if valid_item['app_scope_id'] in scope_ids ]
             if query_level == 'details':
-                app_details = []
-                for application in applications:
-                    app_details.append(
-                        tet_module.run_method(
-                            method_name = 'get',
-                            target = '%s/%s/details' % (TETRATION_API_APPLICATIONS, application['id'])
-                        )
-                    )
-                result['object'] = app_details
+                result['object'] = get_application_details(tet_module, applications or [], cache_dir)
             else:
                 result['object'] = applications if applications else []
         elif query_type == 'scope':
@@ -409,25 +465,14 @@ def main():
             if applications:
                 applications = [ valid_item for valid_item in applications if valid_item['app_scope_id'] == existing_app_scope['id'] ]
             if query_level == 'details':
-                app_details = []
-                for application in applications:
-                    app_details.append(
-                        tet_module.run_method(
-                            method_name = 'get',
-                            target = '%s/%s/details' % (TETRATION_API_APPLICATIONS, application['id'])
-                        )
-                    )
-                result['object'] = app_details
+                result['object'] = get_application_details(tet_module, applications or [], cache_dir)
             else:
                 result['object'] = applications if applications else []
         else:
             if query_level == 'details':
-                existin_app = []
-                app_details = tet_module.run_method(
-                    method_name = 'get',
-                    target = '%s/%s/details' % (TETRATION_API_APPLICATIONS, application['id'])
-                )
-                result['object'] = app_details
+                if not existing_app:
+                    module.fail_json(msg='Unable to find existing application named: %s' % app_name)
+                result['object'] = get_application_details(tet_module, [existing_app], cache_dir)[0]
             else:
                 result['object'] = existing_app
 
@@ -139,9 +139,6 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.tetration.api import TetrationApiModule
 from ansible.module_utils.tetration.api import TETRATION_API_APPLICATIONS
 
-from ansible.utils.display import Display
-display = Display()
-
 from time import sleep
 
 def main():
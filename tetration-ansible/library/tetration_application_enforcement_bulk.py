@@ -0,0 +1,234 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = r'''
+---
+author: Tetration Ansible Contributors
+description:
+- Enables or disables application policy enforcement on many application workspaces
+  in staged waves
+- The enforcement state of every application is read with a single call to the
+  applications list. Applications that need a change are processed in waves of
+  C(wave_size), each wave in parallel, and the rollout stops once more than
+  C(max_failures) applications have failed, including in the middle of a wave.
+extends_documentation_fragment: tetration
+module: tetration_application_enforcement_bulk
+notes:
+- Requires the tetpyclient Python module.
+- Supports check mode.
+options:
+  applications:
+    description:
+    - List of applications to change
+    - Each item accepts C(application_id), C(state) (enabled or disabled) and
+      C(version), as in M(tetration_application_enforcement)
+    required: true
+    type: list
+  concurrency:
+    default: 8
+    description: Maximum number of applications changed in parallel within a wave
+    type: int
+  max_failures:
+    default: 0
+    description:
+    - Number of failed applications tolerated, over all the waves, before the
+      remaining applications are skipped
+    - The calls already running when the limit is exceeded, at most
+      C(concurrency) minus one, still complete
+    type: int
+  wave_pause:
+    default: 0
+    description: Number of seconds to wait between two waves
+    type: int
+  wave_size:
+    default: 50
+    description: Number of applications changed per wave
+    type: int
+requirements: tetpyclient
+version_added: '2.8'
+'''
+
+EXAMPLES = r'''
+# Enforce the latest version of all applications, 25 at a time
+tetration_application_enforcement_bulk:
+    applications: "{{ applications.object | json_query('[].{application_id: id}') }}"
+    wave_size: 25
+    wave_pause: 30
+    max_failures: 3
+    provider:
+      host: "tetration-cluster@company.com"
+      api_key: 1234567890QWERTY
+      api_secret: 1234567890QWERTY
+
+# Enforce specific versions
+tetration_application_enforcement_bulk:
+    applications:
+    - application_id: 5c93da83497d4f33d7145960
+      version: 7
+    - application_id: 5c93da83497d4f33d7145961
+      version: 3
+    - application_id: 5c93da83497d4f33d7145962
+      state: disabled
+    provider:
+      host: "tetration-cluster@company.com"
+      api_key: 1234567890QWERTY
+      api_secret: 1234567890QWERTY
+'''
+
+RETURN = r'''
+---
+disabled:
+  description: Ids of the applications whose enforcement was disabled
+  returned: always
+  type: list
+enabled:
+  description: Ids of the applications whose enforcement was enabled or moved to
+    another version
+  returned: always
+  type: list
+failed_operations:
+  description: Applications whose change was rejected by the API, with the reason
+  returned: on failure
+  type: list
+skipped:
+  description: Ids of the applications not processed because the rollout was aborted
+  returned: always
+  type: list
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.tetration.api import TetrationApiModule
+from ansible.module_utils.tetration.api import TETRATION_API_APPLICATIONS
+
+from time import sleep
+
+APPLICATION_SPEC = dict(
+    application_id=dict(type='str', required=True),
+    version=dict(type='str', required=False, default=None),
+    state=dict(type='str', required=False, choices=['enabled', 'disabled'], default='enabled'),
+)
+
+
+def main():
+    tetration_spec=dict(
+        applications=dict(type='list', elements='dict', options=APPLICATION_SPEC, required=True),
+        wave_size=dict(type='int', required=False, default=50),
+        wave_pause=dict(type='int', required=False, default=0),
+        concurrency=dict(type='int', required=False, default=8),
+        max_failures=dict(type='int', required=False, default=0),
+    )
+
+    argument_spec = dict(
+        provider=dict(required=True),
+    )
+
+    argument_spec.update(tetration_spec)
+    argument_spec.update(TetrationApiModule.provider_spec)
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+    )
+
+    tet_module = TetrationApiModule(module)
+
+    # These are all elements we put in our return JSON object for clarity
+    result = dict(
+        changed=False,
+        enabled=[],
+        disabled=[],
+        skipped=[],
+    )
+
+    wave_size = max(1, module.params['wave_size'])
+    wave_pause = module.params['wave_pause']
+    concurrency = module.params['concurrency']
+    max_failures = module.params['max_failures']
+    check_mode = module.check_mode
+
+    # =========================================================================
+    # Get current state of all applications with a single call
+    existing_apps = tet_module.run_method(
+        method_name = 'get',
+        target = TETRATION_API_APPLICATIONS
+    ) or []
+    existing_apps = dict((app['id'], app) for app in existing_apps)
+
+    # =========================================================================
+    # Compute the changes
+    changes = []
+    for desired in module.params['applications']:
+        application_id = desired['application_id']
+        version = desired['version']
+        existing_app = existing_apps.get(application_id)
+        if not existing_app:
+            module.fail_json(msg='Unable to find application with id: %s' % application_id)
+        if desired['state'] == 'enabled':
+            if not existing_app['enforcement_enabled'] or (version and str(existing_app['enforced_version']) != version):
+                new_object = dict(application_id = application_id)
+                if version:
+                    new_object['version'] = version
+                changes.append(('enabled', application_id, dict(
+                    method_name = 'post',
+                    target = '%s/%s/enable_enforce' % (TETRATION_API_APPLICATIONS, application_id),
+                    req_payload = new_object
+                )))
+        elif existing_app['enforcement_enabled']:
+            changes.append(('disabled', application_id, dict(
+                method_name = 'post',
+                target = '%s/%s/disable_enforce' % (TETRATION_API_APPLICATIONS, application_id)
+            )))
+
+    result['changed'] = bool(changes)
+    if check_mode:
+        for state, application_id, _ in changes:
+            result[state].append(application_id)
+        module.exit_json(**result)
+
+    # =========================================================================
+    # Now push the changes wave by wave
+    failed_operations = []
+    waves = [changes[i:i + wave_size] for i in range(0, len(changes), wave_size)]
+    for idx, wave in enumerate(waves):
+        if len(failed_operations) > max_failures:
+            result['skipped'].extend(application_id for (_, application_id, _) in wave)
+            continue
+        if idx > 0 and wave_pause:
+            sleep(wave_pause)
+        # calls not sent yet stop as soon as the limit is exceeded
+        responses = tet_module.run_method_batch(
+            [operation for (_, _, operation) in wave],
+            concurrency = concurrency,
+            max_failures = max_failures - len(failed_operations)
+        )
+        for (state, application_id, operation), response in zip(wave, responses):
+            if response['ok']:
+                result[state].append(application_id)
+            elif response.get('skipped'):
+                result['skipped'].append(application_id)
+            else:
+                failed_operations.append(dict(
+                    application_id = application_id,
+                    operation = operation['target'].rsplit('/', 1)[-1],
+                    code = response['status_code'],
+                    msg = response['msg']
+                ))
+
+    if failed_operations:
+        module.fail_json(msg='%d applications failed to change enforcement, %d were skipped' % (
+                            len(failed_operations), len(result['skipped'])),
+                         failed_operations=failed_operations, **result)
+    module.exit_json(**result)
+
+if __name__ == '__main__':
+    main()
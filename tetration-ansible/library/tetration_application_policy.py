@@ -22,6 +22,9 @@ module: tetration_application_policy
 notes:
 - Requires the tetpyclient Python module.
 - Supports check mode.
+- When the tasks run in process through the tetration action plugin, the
+  policies of a version of an application are read and indexed once for all
+  the items of a loop. The index is dropped once a policy is changed.
 options:
   app_id:
     description:
@@ -173,11 +176,9 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.tetration.api import TetrationApiModule
 from ansible.module_utils.tetration.api import TETRATION_API_APPLICATIONS
 from ansible.module_utils.tetration.api import TETRATION_API_SCOPES
-from ansible.module_utils.tetration.api import TETRATION_API_INVENTORY_FILTER
 from ansible.module_utils.tetration.api import TETRATION_API_APPLICATION_POLICIES
-
-from ansible.utils.display import Display
-display = Display()
+from ansible.module_utils.tetration.policy import TetrationFilterNameIndex
+from ansible.module_utils.tetration.policy import TetrationPolicyIndex
 
 def main():
     tetration_spec=dict(
@@ -245,7 +246,6 @@ def main():
     existing_app_scope = None
     existing_app = None
     existing_policy = None
-    app_scopes = None
 
     if state == 'present' and rank != 'CATCHALL':
         missing_properties = []
@@ -303,32 +303,17 @@ def main():
             module.fail_json(msg='Unable to find existing app with id: %s' % app_id)
     
     if rank != 'CATCHALL':
-        existing_policies = tet_module.run_method(
-            method_name = 'get',
-            target = '%s/%s/%s' % (TETRATION_API_APPLICATIONS, existing_app['id'], 'absolute_policies' if rank == 'ABSOLUTE' else 'default_policies'),
+        policy_index = TetrationPolicyIndex.from_api(tet_module, existing_app['id'], existing_app.get('latest_adm_version'), rank)
+        existing_policy = policy_index.find(
+            version, rank,
+            consumer_filter_id = consumer_filter_id,
+            consumer_filter_name = consumer_filter_name,
+            provider_filter_id = provider_filter_id,
+            provider_filter_name = provider_filter_name
         )
-        if existing_policies:
-            for policy in existing_policies:
-                if policy['version'] != version:
-                    continue
-                consumer_flag = False
-                provider_flag = False
-                if consumer_filter_id:
-                    consumer_flag = consumer_filter_id == policy['consumer_filter_id']
-                elif consumer_filter_name:
-                    consumer_flag = consumer_filter_name == policy['consumer_filter']['name']
-                    if consumer_flag:
-                        consumer_filter_id = policy['consumer_filter_id']
-                if provider_filter_id:
-                    provider_flag = provider_filter_id == policy['provider_filter_id']
-                elif provider_filter_name:
-                    provider_flag = provider_filter_name == policy['provider_filter']['name']
-                    if provider_flag:
-                        provider_filter_id = policy['provider_filter_id']
-
-                if consumer_flag and provider_flag:
-                    existing_policy = policy
-                    break
+        if existing_policy:
+            consumer_filter_id = existing_policy['consumer_filter_id']
+            provider_filter_id = existing_policy['provider_filter_id']
 
     else:
         existing_policy = tet_module.run_method(
@@ -338,48 +323,16 @@ def main():
 
     if not existing_policy:
         if not (consumer_filter_id and provider_filter_id):
-            app_clusters = tet_module.run_method(
-                method_name = 'get',
-                target = '%s/%s/clusters' % (TETRATION_API_APPLICATIONS, existing_app['id'])
-            )
-            if app_clusters:
-                for item in app_clusters:
-                    consumer_filter_id = consumer_filter_id if consumer_filter_id else item['id'] if item['name'] == consumer_filter_name else None
-                    provider_filter_id = provider_filter_id if provider_filter_id else item['id'] if item['name'] == provider_filter_name else None
-                    if consumer_filter_id and provider_filter_id:
-                        break
-        if not (consumer_filter_id and provider_filter_id):
-            app_scopes = tet_module.get_object(
-                target = TETRATION_API_SCOPES,
-                filter = dict(root_app_scope_id = existing_app_scope['root_app_scope_id']),
-                allow_multiple = True
-            )
-            scope_ids = [ scope['id'] for scope in app_scopes ]
-            inventory_filters = tet_module.run_method(
-                method_name = 'get',
-                target = TETRATION_API_INVENTORY_FILTER,
-            )
-            inventory_filters = [ valid_filter for valid_filter in inventory_filters if valid_filter['app_scope_id'] in scope_ids ]
-            if inventory_filters:
-                for item in inventory_filters:
-                    consumer_filter_id = consumer_filter_id if consumer_filter_id else item['id'] if item['name'] == consumer_filter_name else None
-                    provider_filter_id = provider_filter_id if provider_filter_id else item['id'] if item['name'] == provider_filter_name else None
-                    if consumer_filter_id and provider_filter_id:
-                        break
-        if not (consumer_filter_id and provider_filter_id):
-            if app_scopes:
-                for item in app_scopes:
-                    consumer_filter_id = consumer_filter_id if consumer_filter_id else item['id'] if item['name'] == consumer_filter_name else None
-                    provider_filter_id = provider_filter_id if provider_filter_id else item['id'] if item['name'] == provider_filter_name else None
-                    if consumer_filter_id and provider_filter_id:
-                        break
+            name_index = TetrationFilterNameIndex.from_api(tet_module, existing_app['id'], existing_app_scope['root_app_scope_id'])
+            consumer_filter_id = consumer_filter_id or name_index.resolve(consumer_filter_name)
+            provider_filter_id = provider_filter_id or name_index.resolve(provider_filter_name)
         if not (consumer_filter_id and provider_filter_id):
             if consumer_filter_id and not provider_filter_id:
-                module.fail_json(msg='Failed to resolve provider_filter_id: %s' % provider_filter_id)
+                module.fail_json(msg='Failed to resolve provider_filter_name: %s' % provider_filter_name)
             elif provider_filter_id and not consumer_filter_id:
-                module.fail_json(msg='Failed to resolve consumer_filter_id: %s' % consumer_filter_id)
+                module.fail_json(msg='Failed to resolve consumer_filter_name: %s' % consumer_filter_name)
             else:
-                module.fail_json(msg='Failed to resolve consumer_filter_id: %s and provider_filter_id: %s' % (consumer_filter_id, provider_filter_id))
+                module.fail_json(msg='Failed to resolve consumer_filter_name: %s and provider_filter_name: %s' % (consumer_filter_name, provider_filter_name))
                 
     # =========================================================================
     # Now enforce the desired state (present, absent, query)
@@ -489,6 +442,9 @@ def main():
     elif state == 'query':
         result['object'] = existing_policy
 
+    if result['changed'] and not module.check_mode:
+        TetrationPolicyIndex.invalidate(tet_module, existing_app['id'])
+
     # Return result
     module.exit_json(**result)
 
@@ -0,0 +1,212 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = r'''
+---
+author: Tetration Ansible Contributors
+description:
+- Compares the policies of two versions of an application workspace.
+- Absolute and default policies are matched by rank, consumer and provider names
+  and compared by the hash of their canonical form, so the comparison scales
+  with the number of policies rather than their pairs.
+extends_documentation_fragment: tetration
+module: tetration_application_policy_diff
+notes:
+- Requires the tetpyclient Python module.
+- Supports check mode.
+- This module never changes anything on the cluster.
+options:
+  app_id:
+    description:
+    - The id for the Application
+    - Require one of [C(app_name), C(app_id)]
+    - Mutually exclusive to C(app_name)
+    type: string
+  app_name:
+    description:
+    - The name for the Application
+    - Require one of [C(app_name), C(app_id)]
+    - Mutually exclusive to C(app_id)
+    type: string
+  app_scope_id:
+    description:
+    - The id for the Scope associated with the application
+    - Mutually exclusive to C(app_scope_name)
+    type: string
+  app_scope_name:
+    description:
+    - The name for the Scope associated with the application
+    - Mutually exclusive to C(app_scope_id)
+    type: string
+  base_version:
+    description: Version of the application to compare from, for example C(p1)
+    required: true
+    type: string
+  target_version:
+    description: Version of the application to compare to, for example C(p2)
+    required: true
+    type: string
+requirements: tetpyclient
+version_added: '2.8'
+'''
+
+EXAMPLES = r'''
+# Review the policies discovered by the latest ADM run before enforcing them
+- tetration_application_policy_diff:
+    app_id: 59836821755f02724cbb54fb
+    base_version: p3
+    target_version: v4
+    provider: "{{ my_tetration }}"
+  register: policy_diff
+
+- template:
+    src: application_policy_diff.j2
+    dest: output/application_policy_diff.txt
+'''
+
+RETURN = r'''
+---
+diff:
+  contains:
+    absolute_policies:
+      description: Absolute policies C(added), C(removed) and C(changed) between
+        the versions, and the number of C(unchanged) policies
+      returned: always
+      type: dict
+    catch_all:
+      description: Catch all action of both versions and whether it C(changed)
+      returned: always
+      type: dict
+    default_policies:
+      description: Default policies C(added), C(removed) and C(changed) between
+        the versions, and the number of C(unchanged) policies
+      returned: always
+      type: dict
+  description: Structured difference between the two versions
+  returned: always
+  type: complex
+identical:
+  description: True when both versions have the same policies
+  returned: always
+  type: bool
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.tetration.api import TetrationApiModule
+from ansible.module_utils.tetration.api import TETRATION_API_APPLICATIONS
+from ansible.module_utils.tetration.api import TETRATION_API_SCOPES
+from ansible.module_utils.tetration.policy import TETRATION_POLICY_SECTIONS
+from ansible.module_utils.tetration.policy import diff_policies
+
+
+def main():
+    tetration_spec=dict(
+        app_name=dict(type='str', required=False),
+        app_id=dict(type='str', required=False),
+        app_scope_name=dict(type='str', required=False),
+        app_scope_id=dict(type='str', required=False),
+        base_version=dict(type='str', required=True),
+        target_version=dict(type='str', required=True),
+    )
+
+    argument_spec = dict(
+        provider=dict(required=True),
+    )
+
+    argument_spec.update(tetration_spec)
+    argument_spec.update(TetrationApiModule.provider_spec)
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+        mutually_exclusive=[
+            ['app_name', 'app_id'],
+            ['app_scope_name', 'app_scope_id'],
+        ],
+        required_one_of=[
+            ['app_name', 'app_id'],
+            ['app_scope_name', 'app_scope_id', 'app_id'],
+        ],
+    )
+
+    tet_module = TetrationApiModule(module)
+
+    # These are all elements we put in our return JSON object for clarity
+    result = dict(
+        changed=False,
+        identical=True,
+        diff=dict(),
+    )
+
+    app_name = module.params['app_name']
+    app_id = module.params['app_id']
+    app_scope_name = module.params['app_scope_name']
+    app_scope_id = module.params['app_scope_id']
+    base_version = module.params['base_version']
+    target_version = module.params['target_version']
+
+    # =========================================================================
+    # Find the application
+    if not app_id:
+        if not app_scope_id:
+            existing_app_scope = tet_module.get_object(
+                target = TETRATION_API_SCOPES,
+                filter = dict(name=app_scope_name)
+            )
+            if not existing_app_scope:
+                module.fail_json(msg='Unable to find existing app scope named: %s' % app_scope_name)
+            app_scope_id = existing_app_scope['id']
+        existing_app = tet_module.get_object(
+            target = TETRATION_API_APPLICATIONS,
+            filter = dict(name=app_name, app_scope_id=app_scope_id)
+        )
+        if not existing_app:
+            module.fail_json(msg='Unable to find existing application named: %s' % app_name)
+        app_id = existing_app['id']
+
+    # =========================================================================
+    # Retrieve the policies of both versions in parallel
+    responses = tet_module.run_method_batch([
+        dict(
+            method_name = 'get',
+            target = '%s/%s/policies' % (TETRATION_API_APPLICATIONS, app_id),
+            params = dict(version=version)
+        ) for version in (base_version, target_version)
+    ], concurrency=2)
+    for version, response in zip((base_version, target_version), responses):
+        if not response['ok'] or not response['json']:
+            module.fail_json(
+                msg='Unable to retrieve policies of version %s for application: %s' % (version, app_id),
+                code=response['status_code']
+            )
+    base, target = responses[0]['json'], responses[1]['json']
+
+    # =========================================================================
+    # Compare the versions
+    for section, rank in TETRATION_POLICY_SECTIONS:
+        section_diff = diff_policies(base.get(section), target.get(section), rank)
+        if section_diff['added'] or section_diff['removed'] or section_diff['changed']:
+            result['identical'] = False
+        result['diff'][section] = section_diff
+    result['diff']['catch_all'] = dict(
+        base = base.get('catch_all_action'),
+        target = target.get('catch_all_action'),
+        changed = base.get('catch_all_action') != target.get('catch_all_action')
+    )
+    if result['diff']['catch_all']['changed']:
+        result['identical'] = False
+
+    module.exit_json(**result)
+
+if __name__ == '__main__':
+    main()
@@ -129,10 +129,7 @@ from ansible.module_utils.tetration.api import TetrationApiModule
 from ansible.module_utils.tetration.api import TETRATION_API_APPLICATIONS
 from ansible.module_utils.tetration.api import TETRATION_API_SCOPES
 from ansible.module_utils.tetration.api import TETRATION_API_APPLICATION_POLICIES
-from ansible.module_utils.tetration.api import TETRATION_API_PROTOCOLS
-
-from ansible.utils.display import Display
-display = Display()
+from ansible.module_utils.tetration.protocols import TETRATION_API_PROTOCOLS
 
 from time import sleep
 
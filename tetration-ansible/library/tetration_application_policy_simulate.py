@@ -0,0 +1,291 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = r'''
+---
+author: Tetration Ansible Contributors
+description:
+- Evaluates flows against the policies of an application version locally, to
+  validate enforcement against real traffic before enabling it.
+- Consumer and provider filters are resolved once to sets of addresses. Clusters
+  use their member nodes, filters made only of ip and subnet terms are used as
+  is, and any other filter is resolved with an inventory search.
+- Flows are read from flowsearch results and evaluated in priority order against
+  absolute policies, then default policies, then the catch all action.
+extends_documentation_fragment: tetration
+module: tetration_application_policy_simulate
+notes:
+- Requires the tetpyclient Python module.
+- Supports check mode.
+- This module never changes anything on the cluster.
+options:
+  app_id:
+    description: The id for the Application
+    required: true
+    type: string
+  dest:
+    description:
+    - When set, every evaluated flow is written to this file as one JSON document
+      per line, with the C(action) applied and the C(policy_id) that matched
+    type: path
+  flows:
+    description:
+    - List of flows as returned in the C(results) of a flowsearch query
+    - Mutually exclusive to C(flows_file)
+    type: list
+  flows_file:
+    description:
+    - Path to a file holding flowsearch results, either as a JSON document (a list
+      of flows or a flowsearch response) or as one JSON document per line
+    - Mutually exclusive to C(flows)
+    type: path
+  max_results:
+    default: 100
+    description: Maximum number of denied flows returned in C(denied_flows)
+    type: int
+  root_scope_name:
+    description:
+    - Name of the root scope used for inventory searches when resolving filters
+    - Defaults to the root scope of the application
+    type: string
+  version:
+    description: Version of the application policies to evaluate, for example C(v3)
+    required: true
+    type: string
+requirements: tetpyclient
+version_added: '2.8'
+'''
+
+EXAMPLES = r'''
+# Check which of the flows seen in the last hour would be denied
+- tetration_application_policy_simulate:
+    app_id: 5adff767755f026a0b093f32
+    version: v4
+    flows: "{{ server_flows.json.results }}"
+    provider: "{{ my_tetration }}"
+  register: simulation
+
+- fail:
+    msg: "{{ simulation.denied }} flows would be denied"
+  when: simulation.denied > 0
+'''
+
+RETURN = r'''
+---
+allowed:
+  description: Number of flows allowed
+  returned: always
+  sample: 9934
+  type: int
+denied:
+  description: Number of flows denied
+  returned: always
+  sample: 66
+  type: int
+denied_flows:
+  description: The first C(max_results) denied flows, with the policy that denied
+    them if any
+  returned: always
+  type: list
+total:
+  description: Number of flows evaluated
+  returned: always
+  sample: 10000
+  type: int
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.tetration.api import TetrationApiModule
+from ansible.module_utils.tetration.api import TETRATION_API_APPLICATIONS
+from ansible.module_utils.tetration.api import TETRATION_API_SCOPES
+from ansible.module_utils.tetration.api import TETRATION_API_INVENTORY_SEARCH
+from ansible.module_utils.tetration.protocols import TETRATION_API_PROTOCOLS
+from ansible.module_utils.tetration.json_backend import dumps, loads, iter_array
+from ansible.module_utils.tetration.simulation import TetrationPolicySimulator
+from ansible.module_utils.tetration.simulation import query_networks
+
+
+def load_flows(path):
+    ''' Yields the flows stored in a file, either as one JSON document or as
+    one JSON document per line
+    '''
+    with open(path, 'r') as f:
+        first = f.readline()
+        f.seek(0)
+        try:
+            loads(first)
+            documents = (loads(line) for line in f if line.strip())
+        except ValueError:
+            if first.lstrip().startswith('['):
+                # a list of flows is parsed one flow at a time
+                documents = iter_array(f)
+            else:
+                documents = [loads(f.read())]
+        for document in documents:
+            if isinstance(document, dict) and 'results' in document:
+                document = document['results']
+            if isinstance(document, list):
+                for flow in document:
+                    yield flow
+            else:
+                yield document
+
+
+def inventory_addresses(tet_module, query, root_scope_name):
+    ''' Returns the addresses of the inventory matching a query
+    '''
+    addresses = []
+    payload = dict(filter=query, scopeName=root_scope_name)
+    while True:
+        response = tet_module.run_method(
+            method_name = 'post',
+            target = TETRATION_API_INVENTORY_SEARCH,
+            req_payload = payload
+        ) or dict()
+        addresses.extend(item['ip'] for item in response.get('results') or [] if item.get('ip'))
+        if not response.get('offset'):
+            return addresses
+        payload['offset'] = response['offset']
+
+
+def main():
+    tetration_spec=dict(
+        app_id=dict(type='str', required=True),
+        version=dict(type='str', required=True),
+        flows=dict(type='list', required=False),
+        flows_file=dict(type='path', required=False),
+        root_scope_name=dict(type='str', required=False),
+        dest=dict(type='path', required=False),
+        max_results=dict(type='int', required=False, default=100),
+    )
+
+    argument_spec = dict(
+        provider=dict(required=True),
+    )
+
+    argument_spec.update(tetration_spec)
+    argument_spec.update(TetrationApiModule.provider_spec)
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+        mutually_exclusive=[
+            ['flows', 'flows_file'],
+        ],
+        required_one_of=[
+            ['flows', 'flows_file'],
+        ],
+    )
+
+    tet_module = TetrationApiModule(module)
+
+    # These are all elements we put in our return JSON object for clarity
+    result = dict(
+        changed=False,
+        total=0,
+        allowed=0,
+        denied=0,
+        denied_flows=[],
+    )
+
+    app_id = module.params['app_id']
+    version = module.params['version']
+    root_scope_name = module.params['root_scope_name']
+    dest = module.params['dest']
+    max_results = module.params['max_results']
+
+    # =========================================================================
+    # Retrieve the policies and clusters of the application version
+    existing_app = tet_module.run_method(
+        method_name = 'get',
+        target = '%s/%s' % (TETRATION_API_APPLICATIONS, app_id)
+    )
+    if not existing_app:
+        module.fail_json(msg='Unable to find application with id: %s' % app_id)
+    responses = tet_module.run_method_batch([
+        dict(
+            method_name = 'get',
+            target = '%s/%s/%s' % (TETRATION_API_APPLICATIONS, app_id, name),
+            params = dict(version=version)
+        ) for name in ('policies', 'clusters')
+    ], concurrency=2)
+    for name, response in zip(('policies', 'clusters'), responses):
+        if not response['ok']:
+            module.fail_json(
+                msg='Unable to retrieve %s of version %s for application: %s' % (name, version, app_id),
+                code=response['status_code']
+            )
+    policies = responses[0]['json'] or dict()
+    clusters = responses[1]['json'] or []
+    if not root_scope_name:
+        app_scope = tet_module.run_method(
+            method_name = 'get',
+            target = '%s/%s' % (TETRATION_API_SCOPES, existing_app['app_scope_id'])
+        )
+        root_scope = tet_module.run_method(
+            method_name = 'get',
+            target = '%s/%s' % (TETRATION_API_SCOPES, app_scope['root_app_scope_id'])
+        )
+        root_scope_name = root_scope['name']
+
+    # =========================================================================
+    # Resolve every consumer and provider filter to its addresses, once
+    members = dict()
+    for cluster in clusters:
+        members[cluster['id']] = [node['ip'] for node in cluster.get('nodes') or [] if node.get('ip')]
+    for section in ('absolute_policies', 'default_policies'):
+        for policy in policies.get(section) or []:
+            for role in ('consumer', 'provider'):
+                filter_id = policy.get('%s_filter_id' % role)
+                if filter_id in members:
+                    continue
+                query = (policy.get('%s_filter' % role) or dict()).get('query')
+                networks = query_networks(query)
+                if networks is None:
+                    networks = inventory_addresses(tet_module, query, root_scope_name) if query else []
+                members[filter_id] = networks
+
+    protocols = dict((protocol['name'], protocol['value']) for protocol in TETRATION_API_PROTOCOLS if protocol['value'] != '')
+    simulator = TetrationPolicySimulator(policies, members, protocols)
+
+    # =========================================================================
+    # Evaluate the flows
+    flows = module.params['flows'] if module.params['flows'] is not None else load_flows(module.params['flows_file'])
+    output = open(dest, 'w') if dest else None
+    try:
+        for flow, action, rule in simulator.evaluate_flows(flows):
+            result['total'] += 1
+            policy_id = rule['id'] if rule else None
+            if action == 'ALLOW':
+                result['allowed'] += 1
+            else:
+                result['denied'] += 1
+                if len(result['denied_flows']) < max_results:
+                    result['denied_flows'].append(dict(
+                        src_address = flow.get('src_address'),
+                        dst_address = flow.get('dst_address'),
+                        proto = flow.get('proto'),
+                        dst_port = flow.get('dst_port'),
+                        policy_id = policy_id
+                    ))
+            if output:
+                output.write(dumps(dict(flow=flow, action=action, policy_id=policy_id)))
+                output.write('\n')
+    finally:
+        if output:
+            output.close()
+
+    module.exit_json(**result)
+
+if __name__ == '__main__':
+    main()
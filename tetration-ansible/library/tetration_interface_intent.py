@@ -125,9 +125,6 @@ from ansible.module_utils.tetration.api import TETRATION_API_TENANT
 from ansible.module_utils.tetration.api import TETRATION_API_INVENTORY_FILTER
 from ansible.module_utils.tetration.api import TETRATION_API_SCOPES
 
-from ansible.utils.display import Display
-display = Display()
-
 def main():
     tetration_spec=dict(
         vrf_name=dict(type='str', required=False),
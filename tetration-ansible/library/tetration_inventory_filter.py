@@ -205,9 +205,7 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.tetration.api import TetrationApiModule
 from ansible.module_utils.tetration.api import TETRATION_API_INVENTORY_FILTER
 from ansible.module_utils.tetration.api import TETRATION_API_SCOPES
-
-from ansible.utils.display import Display
-display = Display()
+from ansible.module_utils.tetration.query import queries_equal
 
 def main():
     tetration_spec=dict(
@@ -318,8 +316,9 @@ def main():
             for k in ['app_scope_id', 'primary', 'public']:
                 if module.params[k] is not None and existing_object[k] != module.params[k]:
                     update_needed = True
-            # if query doesn't match, UPDATE!
-            if module.params['query'] is not None and module.params['query'] != existing_object['short_query']:
+            # if query doesn't match, UPDATE! Reordered and/or clauses or
+            # differently written subnets are not a change.
+            if module.params['query'] is not None and not queries_equal(module.params['query'], existing_object['short_query']):
                 update_needed = True
             if update_needed:
                 changed = True
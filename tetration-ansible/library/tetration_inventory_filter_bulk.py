@@ -0,0 +1,258 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = r'''
+---
+author: Tetration Ansible Contributors
+description:
+- Reconciles many Cisco Tetration inventory filters in a single task.
+- Scopes and inventory filters are retrieved once, compared against the desired
+  list and only the filters that differ are created, updated or deleted.
+- Queries are compared by their canonical form, so reordered C(and)/C(or) clauses
+  are not reported as a change.
+extends_documentation_fragment: tetration
+module: tetration_inventory_filter_bulk
+notes:
+- Requires the tetpyclient Python module.
+- Supports check mode.
+options:
+  concurrency:
+    default: 8
+    description: Maximum number of API calls executed in parallel
+    type: int
+  filters:
+    description:
+    - List of desired inventory filters
+    - Each item accepts the options of M(tetration_inventory_filter) C(name),
+      C(app_scope_id), C(app_scope_name), C(query), C(primary), C(public) and C(state)
+    required: true
+    type: list
+  purge:
+    default: 'false'
+    description:
+    - When true, inventory filters that belong to one of the scopes referenced in
+      C(filters) but are not listed are deleted
+    type: bool
+requirements: tetpyclient
+version_added: '2.8'
+'''
+
+EXAMPLES = r'''
+# Make the filters of the Default scope match the list exactly
+- tetration_inventory_filter_bulk:
+    provider: "{{ my_tetration }}"
+    purge: true
+    filters:
+    - name: hostname contains dns
+      app_scope_name: Default
+      query:
+        field: host_name
+        type: contains
+        value: dns
+    - name: vpn users subnet
+      app_scope_name: Default
+      query:
+        field: ip
+        type: subnet
+        value: 192.168.100.0/24
+    - name: old filter
+      app_scope_name: Default
+      state: absent
+'''
+
+RETURN = r'''
+---
+created:
+  description: Inventory filters that were created
+  returned: always
+  type: list
+deleted:
+  description: Inventory filters that were deleted
+  returned: always
+  type: list
+failed_operations:
+  description: Operations that were rejected by the API, with the reason
+  returned: on failure
+  type: list
+updated:
+  description: Inventory filters that were updated
+  returned: always
+  type: list
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.tetration.api import TetrationApiModule
+from ansible.module_utils.tetration.api import TETRATION_API_INVENTORY_FILTER
+from ansible.module_utils.tetration.api import TETRATION_API_SCOPES
+from ansible.module_utils.tetration.query import queries_equal
+
+FILTER_SPEC = dict(
+    name=dict(type='str', required=True),
+    query=dict(type='dict', required=False),
+    app_scope_id=dict(type='str', required=False),
+    app_scope_name=dict(type='str', required=False),
+    primary=dict(type='bool', required=False, default=False),
+    public=dict(type='bool', required=False, default=False),
+    state=dict(type='str', required=False, choices=['present', 'absent'], default='present'),
+)
+
+
+def main():
+    tetration_spec=dict(
+        filters=dict(type='list', elements='dict', options=FILTER_SPEC, required=True),
+        purge=dict(type='bool', required=False, default=False),
+        concurrency=dict(type='int', required=False, default=8),
+    )
+
+    argument_spec = dict(
+        provider=dict(required=True),
+    )
+
+    argument_spec.update(tetration_spec)
+    argument_spec.update(TetrationApiModule.provider_spec)
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+    )
+
+    tet_module = TetrationApiModule(module)
+
+    # These are all elements we put in our return JSON object for clarity
+    result = dict(
+        changed=False,
+        created=[],
+        updated=[],
+        deleted=[],
+    )
+
+    desired_filters = module.params['filters']
+    purge = module.params['purge']
+    concurrency = module.params['concurrency']
+
+    # =========================================================================
+    # Get current state of all objects with one call per collection
+    app_scopes = tet_module.run_method(
+        method_name = 'get',
+        target = TETRATION_API_SCOPES
+    ) or []
+    scope_ids_by_name = dict((scope['name'], scope['id']) for scope in app_scopes)
+
+    inventory_filters = tet_module.run_method(
+        method_name = 'get',
+        target = TETRATION_API_INVENTORY_FILTER
+    ) or []
+    existing_filters = dict(((item['app_scope_id'], item['name']), item) for item in inventory_filters)
+
+    # =========================================================================
+    # Compute the difference between desired and current state
+    operations = []
+    managed_keys = set()
+    managed_scope_ids = set()
+    for desired in desired_filters:
+        app_scope_id = desired['app_scope_id']
+        if desired['app_scope_name'] is not None:
+            app_scope_id = scope_ids_by_name.get(desired['app_scope_name'])
+            if not app_scope_id:
+                module.fail_json(msg='Unable to find existing app scope named: %s' % desired['app_scope_name'])
+        if not app_scope_id:
+            module.fail_json(msg='One of app_scope_id or app_scope_name is required for filter: %s' % desired['name'])
+        key = (app_scope_id, desired['name'])
+        if key in managed_keys:
+            module.fail_json(msg='Inventory filter %s is listed more than once for scope: %s' % (desired['name'], app_scope_id))
+        managed_keys.add(key)
+        managed_scope_ids.add(app_scope_id)
+        existing_object = existing_filters.get(key)
+
+        if desired['state'] == 'absent':
+            if existing_object:
+                operations.append(('deleted', existing_object, dict(
+                    method_name = 'delete',
+                    target = '%s/%s' % (TETRATION_API_INVENTORY_FILTER, existing_object['id'])
+                )))
+            continue
+
+        primary = desired['primary']
+        new_object = dict(
+            name = desired['name'],
+            app_scope_id = app_scope_id,
+            primary = primary,
+            public = desired['public'] if primary else False
+        )
+        if desired['query'] is not None:
+            new_object['query'] = desired['query']
+
+        if not existing_object:
+            operations.append(('created', new_object, dict(
+                method_name = 'post',
+                target = TETRATION_API_INVENTORY_FILTER,
+                req_payload = new_object
+            )))
+            continue
+
+        update_needed = False
+        for k in ['primary', 'public']:
+            if existing_object[k] != new_object[k]:
+                update_needed = True
+        if desired['query'] is not None and not queries_equal(desired['query'], existing_object['short_query']):
+            update_needed = True
+        if update_needed:
+            new_object['id'] = existing_object['id']
+            operations.append(('updated', new_object, dict(
+                method_name = 'put',
+                target = '%s/%s' % (TETRATION_API_INVENTORY_FILTER, existing_object['id']),
+                req_payload = dict((k, v) for k, v in new_object.items() if k != 'id')
+            )))
+
+    if purge:
+        for key, existing_object in existing_filters.items():
+            if key[0] in managed_scope_ids and key not in managed_keys and existing_object['name'] != 'Everything':
+                operations.append(('deleted', existing_object, dict(
+                    method_name = 'delete',
+                    target = '%s/%s' % (TETRATION_API_INVENTORY_FILTER, existing_object['id'])
+                )))
+
+    # =========================================================================
+    # Now apply the changes in parallel
+    result['changed'] = bool(operations)
+    if not module.check_mode:
+        responses = tet_module.run_method_batch(
+            [operation for (_, _, operation) in operations],
+            concurrency = concurrency
+        )
+    else:
+        responses = [dict(ok=True, json=None)] * len(operations)
+
+    failed_operations = []
+    for (action, obj, operation), response in zip(operations, responses):
+        if not response['ok']:
+            failed_operations.append(dict(
+                name = obj['name'],
+                app_scope_id = obj['app_scope_id'],
+                operation = operation['method_name'],
+                code = response['status_code'],
+                msg = response['msg']
+            ))
+            continue
+        if action == 'created' and response['json']:
+            obj = response['json']
+        result[action].append(obj)
+
+    if failed_operations:
+        module.fail_json(msg='%d of %d inventory filter operations failed' % (len(failed_operations), len(operations)),
+                         failed_operations=failed_operations, **result)
+
+    module.exit_json(**result)
+
+if __name__ == '__main__':
+    main()
@@ -35,25 +35,75 @@ options:
     description: secret from downloaded API credentials
     required: true
     type: string
+  concurrency:
+    default: 8
+    description: Maximum number of I(requests) executed in parallel
+    type: int
+  compress:
+    default: false
+    description: Compress I(dest) with gzip
+    type: bool
+  compress_requests:
+    default: false
+    description:
+    - Send payloads larger than 1KB gzip compressed, for bulk uploads to clusters
+      accepting C(Content-Encoding: gzip)
+    - Responses are always requested with gzip or deflate transfer encoding
+    type: bool
+  dest:
+    description:
+    - File the response is written to instead of being returned in C(json), so
+      that large results never go through the Ansible task result
+    - With I(paginate), the records are written as one JSON document per line
+    - Only the number of records is returned, in C(records), when the response
+      is a JSON array or an object with a C(results) array
+    - The response is copied to the file as it is received and never held in
+      memory. The file is removed if the call fails
+    - Only used with I(name)
+    type: path
   host:
     description: URL for the Tetration GUI
     required: true
     type: string
+  max_records:
+    description: With I(paginate), stop once this number of records is retrieved
+    type: int
   method:
     choices: '[delete, get, post, put]'
-    description: REST method
-    required: true
+    description:
+    - REST method
+    - Required with I(name)
     type: string
   name:
-    description: API endpoint such as 'roles' or 'users'
-    required: true
+    description:
+    - API endpoint such as 'roles' or 'users'
+    - Mutually exclusive to I(requests)
     type: string
+  paginate:
+    default: false
+    description:
+    - Follow the C(offset) returned by paged endpoints such as C(sensors),
+      C(inventory/search) or C(flowsearch) and return the records of all pages in
+      C(json.results)
+    - The offset is sent in I(params) for I(method=get) and in I(payload) for
+      I(method=post)
+    - Only used with I(name)
+    type: bool
   params:
     description: parameters for REST call is used if I(method=get)
     type: dict
   payload:
     description: payload for REST call is used if I(method=put) or I(method=post)
     type: dict
+  requests:
+    description:
+    - List of REST calls executed concurrently in a single task, instead of looping
+      over the module
+    - Each item accepts C(name), C(method) (defaults to get), C(params), C(payload)
+      and C(item), any data returned unchanged with the result of the call
+    - Results are returned in I(results), in the order of the requests
+    - Mutually exclusive to I(name)
+    type: list
 requirements: tetpyclient
 short_description: Direct access to the Tetration API (non-idempotent)
 version_added: '2.8'
@@ -98,6 +148,53 @@ EXAMPLES = r'''
     payload:
       description: updated role description
 
+# Retrieve the whole inventory of a scope, 100k records at most, following
+# the offset returned with every page.
+- tetration_rest:
+    api_key: "{{ api_key }}"
+    api_secret: "{{ api_secret }}"
+    host: "{{ tetration_host }}"
+    name: inventory/search
+    method: post
+    payload:
+      scopeName: Default
+      filter:
+        type: subnet
+        field: ip
+        value: 10.0.0.0/8
+    paginate: true
+    max_records: 100000
+    dest: output/inventory.jsonl.gz
+    compress: true
+
+# Save the flows of one hour to a file instead of registering them
+- tetration_rest:
+    api_key: "{{ api_key }}"
+    api_secret: "{{ api_secret }}"
+    host: "{{ tetration_host }}"
+    name: flowsearch
+    method: post
+    payload:
+      t0: "2019-04-01T09:00:00-0000"
+      t1: "2019-04-01T10:00:00-0000"
+      scopeName: Default
+      limit: 5000
+    dest: output/flows.json
+
+# Query the clusters of every application in one task. Like the results of a
+# loop, every result holds the json returned and the item of its request.
+- set_fact:
+    cluster_requests: "{{ cluster_requests | default([]) + [{'name': 'applications/' ~ item.id ~ '/clusters', 'item': item}] }}"
+  loop: "{{ applications.json }}"
+
+- tetration_rest:
+    api_key: "{{ api_key }}"
+    api_secret: "{{ api_secret }}"
+    host: "{{ tetration_host }}"
+    requests: "{{ cluster_requests }}"
+    concurrency: 16
+  register: app_clusters
+
 # Delete one software agent.
 - tetration_rest:
     api_key: "{{ api_key }}"
@@ -134,62 +231,153 @@ object:
       description: Text returned from REST method
       returned: failed
       type: string
+dest:
+  description: File the response or records were written to
+  returned: when I(dest) is used
+  type: string
+pages:
+  description: Number of pages retrieved
+  returned: when I(paginate) is used
+  type: int
+records:
+  description: Number of records retrieved, null when the response written to
+    I(dest) is neither a JSON array nor an object with a C(results) array
+  returned: when I(paginate) or I(dest) is used
+  type: int
+transfer:
+  description:
+  - Bytes transferred by the task, before and after compression, with the
+    compression ratio of the responses and the total number of bytes saved
+  returned: unless the calls go through a tetration-api-worker
+  type: dict
+  sample: {"requests": 1, "request_bytes": 0, "request_bytes_sent": 0, "response_bytes": 5263144,
+    "response_bytes_received": 402518, "response_ratio": 13.08, "bytes_saved": 4860626}
+results:
+  description:
+  - One result per item of I(requests), in the same order
+  - Each result holds the C(name), C(method) and C(changed) status of the call,
+    the C(item) of the request and the keys described for I(object)
+  returned: when I(requests) is used
+  type: list
 '''
 
+import codecs
+import gzip
+import os
+
 from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.module_utils.tetration.api import get_rest_client
+from ansible.module_utils.tetration.json_backend import dumps, iter_array, response_json
 
 
-def main():
-    module = AnsibleModule(
-        argument_spec=dict(
-            api_key=dict(type='str', required=True),
-            api_secret=dict(type='str', required=True),
-            host=dict(type='str', required=True),
-            api_version=dict(type='str', default='v1'),
-            name=dict(type='str', required=True),
-            method=dict(type='str', required=True, choices=['delete', 'get', 'post', 'put']),
-            payload=dict(type='dict', required=False),
-            params=dict(type='dict', required=False),
-        ),
-        # we can't predict if the proposed API call will make a change to the system
-        supports_check_mode=False
-    )
+REQUEST_SPEC = dict(
+    name=dict(type='str', required=True),
+    method=dict(type='str', default='get', choices=['delete', 'get', 'post', 'put']),
+    payload=dict(type='dict', required=False),
+    params=dict(type='dict', required=False),
+    item=dict(type='raw', required=False),
+)
 
-    # if tetpyclient is not available, our only option is to fail
+
+def count_records(document):
+    ''' Returns the number of records in a response document
+    '''
+    if isinstance(document, dict) and isinstance(document.get('results'), list):
+        return len(document['results'])
+    if isinstance(document, list):
+        return len(document)
+    return 1
+
+
+def open_dest(path, compress=False):
+    if compress:
+        return gzip.open(path, 'wb')
+    return open(path, 'wb')
+
+
+def close_dest(path, output, result):
+    ''' Closes the file a response was written to, removing it unless the call
+    succeeded so that no partial or empty file is left behind
+    '''
+    if output is None:
+        return
+    output.close()
+    if not (result and result['ok']):
+        os.remove(path)
+
+
+class ResponseReader(object):
+    ''' File like object returning the body of a streamed response as text,
+    copying every chunk read to output as is
+    '''
+    def __init__(self, response, output, chunk_size=65536):
+        self.chunks = response.iter_content(chunk_size=chunk_size)
+        self.output = output
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.size = 0
+
+    def read(self, size=-1):
+        for chunk in self.chunks:
+            self.output.write(chunk)
+            self.size += len(chunk)
+            text = self.decoder.decode(chunk)
+            if text:
+                return text
+        return self.decoder.decode(b'', True)
+
+    def copy(self):
+        ''' Copies the chunks not read yet to output without decoding them
+        '''
+        for chunk in self.chunks:
+            self.output.write(chunk)
+            self.size += len(chunk)
+
+
+def write_response(response, output):
+    ''' Copies the body of a response to output chunk by chunk and returns the
+    number of records it holds, or None if the body is neither a JSON array
+    nor an object with a results array, along with the number of bytes written
+    Only the records are decoded, one at a time.
+    '''
+    reader = ResponseReader(response, output)
+    records = 0
     try:
-        import json
-        import tetpyclient
-        from tetpyclient import RestClient
-    except ImportError:
-        module.fail_json(msg="Some module dependencies are missing.")
-
-    method = module.params['method']
-    api_name = '/openapi/' + module.params['api_version'] + '/' + module.params['name']
-    req_payload = module.params['payload']
-
-    restclient = RestClient(
-        module.params['host'],
-        api_key=module.params['api_key'],
-        api_secret=module.params['api_secret'],
-        verify=False
-    )
-    
+        for _ in iter_array(reader, key='results'):
+            records += 1
+    except ValueError:
+        records = None
+    # copy what follows the records, or the rest of any other body
+    reader.copy()
+    return records, reader.size
+
+
+def call_api(restclient, api_version, name, method, params=None, payload=None, output=None):
+    ''' Makes one REST call and returns the result and changed status
+    When output is set, a successful response body is written to it as is and
+    only its number of records is returned.
+    '''
+    api_name = '/openapi/' + api_version + '/' + name
+
     # Do our best to provide "changed" status accurately, but it's not possible
     # as different Tetration APIs react differently to operations like creating
     # an element that already exists.
     changed = False
     if method == 'get':
-        response = restclient.get(api_name, params=module.params['params'])
+        args = dict(params=params)
     elif method == 'delete':
-        response = restclient.delete(api_name)
-        changed = True if response.status_code / 100 == 2 else False
-    elif method == 'post':
-        response = restclient.post(api_name, json_body=json.dumps(req_payload))
-        changed = True if response.status_code / 100 == 2 else False
-    elif method == 'put':
-        response = restclient.put(api_name, json_body=json.dumps(req_payload))
-        changed = True if response.status_code / 100 == 2 else False
-
+        args = dict()
+    else:
+        args = dict(json_body=dumps(payload))
+    if output:
+        # the body is copied to output as it is received instead of being held
+        # in memory
+        from ansible.module_utils.tetration.transport import count_streamed_response, stream_response
+        response = stream_response(restclient, method, api_name, **args)
+    else:
+        response = getattr(restclient, method)(api_name, **args)
+    if method != 'get':
+        changed = response.status_code // 100 == 2
 
     # Put status_code in the return JSON. If the status_code is not 200, we
     # add the text that came from the REST call and the payload to make
@@ -198,12 +386,201 @@ def main():
     result['status_code'] = response.status_code
     result['ok'] = response.ok
     result['reason'] = response.reason
-    if int(response.status_code) / 100 == 2:
-        result['json'] = response.json()
+    if int(response.status_code) // 100 == 2 and output:
+        result['records'], size = write_response(response, output)
+        count_streamed_response(restclient, response, size)
+    elif int(response.status_code) // 100 == 2:
+        result['json'] = response_json(response)
     else:
         result['text'] = response.text
+        if output:
+            count_streamed_response(restclient, response, len(response.content))
+    return result, changed
+
+
+def call_api_paginated(restclient, api_version, name, method, params=None, payload=None,
+                       max_records=None, output=None):
+    ''' Follows the offset returned by a paged endpoint, in the params of a get
+    or the payload of a post, until the last page or max_records is reached.
+    The records of all pages are returned in json.results, or written to output
+    as one JSON document per line when output is set.
+    '''
+    params = dict(params or dict())
+    payload = dict(payload or dict())
+    records = []
+    count = 0
+    pages = 0
+    while True:
+        result, changed = call_api(restclient, api_version, name, method, params=params, payload=payload)
+        if not result['ok']:
+            break
+        pages += 1
+        page = result.pop('json')
+        if isinstance(page, dict):
+            page_records = page.get('results') or []
+            offset = page.get('offset')
+        else:
+            page_records = page or []
+            offset = None
+        if max_records is not None:
+            page_records = page_records[:max(0, max_records - count)]
+        count += len(page_records)
+        if output:
+            for record in page_records:
+                output.write(to_bytes(dumps(record)))
+                output.write(b'\n')
+        else:
+            records.extend(page_records)
+        if not offset or not page_records or (max_records is not None and count >= max_records):
+            break
+        if method == 'get':
+            params['offset'] = offset
+        else:
+            payload['offset'] = offset
+
+    if result['ok'] and not output:
+        result['json'] = dict(results=records)
+    result['pages'] = pages
+    result['records'] = count
+    return result
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            api_key=dict(type='str', required=True),
+            api_secret=dict(type='str', required=True),
+            host=dict(type='str', required=True),
+            api_version=dict(type='str', default='v1'),
+            name=dict(type='str', required=False),
+            method=dict(type='str', required=False, choices=['delete', 'get', 'post', 'put']),
+            payload=dict(type='dict', required=False),
+            params=dict(type='dict', required=False),
+            requests=dict(type='list', elements='dict', options=REQUEST_SPEC, required=False),
+            concurrency=dict(type='int', required=False, default=8),
+            paginate=dict(type='bool', required=False, default=False),
+            max_records=dict(type='int', required=False),
+            dest=dict(type='path', required=False),
+            compress=dict(type='bool', required=False, default=False),
+            compress_requests=dict(type='bool', required=False, default=False),
+        ),
+        mutually_exclusive=[
+            ['name', 'requests'],
+        ],
+        required_one_of=[
+            ['name', 'requests'],
+        ],
+        required_together=[
+            ['name', 'method'],
+        ],
+        # we can't predict if the proposed API call will make a change to the system
+        supports_check_mode=False
+    )
+
+    api_version = module.params['api_version']
 
-    module.exit_json(changed=changed, **result)
+    # if tetpyclient is not available, our only option is to fail
+    try:
+        restclient = get_rest_client(
+            server_endpoint=module.params['host'],
+            api_key=module.params['api_key'],
+            api_secret=module.params['api_secret'],
+            verify=False,
+            compress_requests=module.params['compress_requests']
+        )
+    except Exception as exc:
+        module.fail_json(msg=to_text(exc))
+
+    # the client may be shared with earlier tasks, only report this task
+    stats = getattr(restclient, 'transfer_stats', None)
+    stats_before = dict(stats) if stats is not None else None
+
+    def exit_json(**result):
+        if stats is not None:
+            from ansible.module_utils.tetration.transport import transfer_summary
+            result['transfer'] = transfer_summary(stats, since=stats_before)
+        module.exit_json(**result)
+
+    if module.params['name'] and module.params['paginate']:
+        if module.params['method'] not in ('get', 'post'):
+            module.fail_json(msg='paginate requires method get or post')
+        dest = module.params['dest']
+        output = open_dest(dest, module.params['compress']) if dest else None
+        result = None
+        try:
+            result = call_api_paginated(
+                restclient,
+                api_version,
+                module.params['name'],
+                module.params['method'],
+                params=module.params['params'],
+                payload=module.params['payload'],
+                max_records=module.params['max_records'],
+                output=output
+            )
+        finally:
+            close_dest(dest, output, result)
+        if dest and result['ok']:
+            result['dest'] = dest
+        # paged endpoints, including the post based searches, only read data
+        exit_json(changed=False, **result)
+
+    if module.params['name']:
+        dest = module.params['dest']
+        output = open_dest(dest, module.params['compress']) if dest else None
+        result = None
+        try:
+            result, changed = call_api(
+                restclient,
+                api_version,
+                module.params['name'],
+                module.params['method'],
+                params=module.params['params'],
+                payload=module.params['payload'],
+                output=output
+            )
+        finally:
+            close_dest(dest, output, result)
+        if dest and result['ok']:
+            result['dest'] = dest
+        exit_json(changed=changed, **result)
+
+    # =========================================================================
+    # Batch of requests, executed concurrently over the same client
+    def execute(request):
+        try:
+            result, changed = call_api(
+                restclient,
+                api_version,
+                request['name'],
+                request['method'],
+                params=request['params'],
+                payload=request['payload']
+            )
+        except Exception as exc:
+            result, changed = dict(status_code=None, ok=False, reason=None, text=to_text(exc)), False
+        result['name'] = request['name']
+        result['method'] = request['method']
+        result['changed'] = changed
+        if request['item'] is not None:
+            result['item'] = request['item']
+        return result
+
+    requests = module.params['requests']
+    results = []
+    if requests:
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(max(1, min(module.params['concurrency'], len(requests))))
+        try:
+            results = pool.map(execute, requests)
+        finally:
+            pool.close()
+            pool.join()
+
+    exit_json(
+        changed=any(result['changed'] for result in results),
+        results=results
+    )
 
 
 if __name__ == '__main__':
@@ -149,6 +149,7 @@ object:
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.tetration.api import TetrationApiModule
 from ansible.module_utils.tetration.api import TETRATION_API_ROLE
+from ansible.module_utils.tetration.users import TETRATION_ROLE_CAPABILITIES
 
 
 def main():
@@ -185,16 +186,6 @@ def main():
         object=None,
     )
 
-
-    CAPABILITIES = {
-        'read': 'SCOPE_READ',
-        'write': 'SCOPE_WRITE',
-        'execute': 'EXECUTE',
-        'developer': 'DEVELOPER',
-        'enforce': 'ENFORCE',
-        'owner': 'SCOPE_OWNER',
-    }
-
     state = module.params['state']
     scope = module.params['app_scope_id']
     name = module.params['name']
@@ -296,7 +287,7 @@ def main():
 
         # now we need to see if we should add the capabilities specified
         if module.params['capability_ability'] is not None:
-            my_ability = CAPABILITIES[module.params['capability_ability']]
+            my_ability = TETRATION_ROLE_CAPABILITIES[module.params['capability_ability']]
             my_scope = module.params['capability_appscope']
             if existing_object and 'capabilities' in existing_object:
                 t = [ (obj['ability'], obj['app_scope_id']) for obj in existing_object['capabilities'] ]
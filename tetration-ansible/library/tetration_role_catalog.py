@@ -0,0 +1,361 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = r'''
+---
+author: Tetration Ansible Contributors
+description:
+- Synchronizes a catalog of Cisco Tetration roles and of their capabilities in a
+  single task.
+- Roles are retrieved once. The capabilities of every role are reduced to a hash
+  of their set of (ability, scope), and only the roles whose hash differs from
+  the catalog are compared in detail, so an unchanged catalog costs no call
+  besides the reads.
+- Roles are created, updated and deleted in parallel, then the missing
+  capabilities are added in parallel, one call at a time for each role. The API
+  has no call adding several capabilities at once, so each capability is added
+  by its own call.
+extends_documentation_fragment: tetration
+module: tetration_role_catalog
+notes:
+- Requires the tetpyclient Python module.
+- Supports check mode.
+- As with M(tetration_role), capabilities can be added but not removed. The
+  capabilities of a role that are not in the catalog are returned in
+  C(extra_capabilities).
+- When the roles list of the cluster does not include capabilities, they are read
+  with one call per role of the catalog, made in parallel.
+options:
+  concurrency:
+    default: 8
+    description: Maximum number of API calls executed in parallel
+    type: int
+  purge:
+    default: 'false'
+    description:
+    - When true, roles of the scopes used in C(roles) that are not listed are
+      deleted
+    type: bool
+  roles:
+    description:
+    - List of desired roles
+    - Each item accepts C(name), C(description), C(app_scope_id) or
+      C(app_scope_name) of the scope the role belongs to (none for a service
+      provider role), C(capabilities) and C(state) (present or absent)
+    - Each capability accepts C(ability), one of read, write, execute, developer,
+      enforce or owner, and C(app_scope_id) or C(app_scope_name), by default the
+      scope of the role
+    required: true
+    type: list
+requirements: tetpyclient
+version_added: '2.8'
+'''
+
+EXAMPLES = r'''
+# Apply the same role catalog to every cluster
+- tetration_role_catalog:
+    provider: "{{ item }}"
+    roles: "{{ role_catalog }}"
+  loop: "{{ tetration_clusters }}"
+
+# role_catalog defined in the variables
+role_catalog:
+- name: expenses app owner
+  description: owner of the expenses application
+  app_scope_name: Default
+  capabilities:
+  - ability: owner
+    app_scope_name: Default:Expenses
+- name: expenses app reader
+  description: read only access to the expenses application
+  app_scope_name: Default
+  capabilities:
+  - ability: read
+    app_scope_name: Default:Expenses
+'''
+
+RETURN = r'''
+---
+capabilities_added:
+  description: Capabilities added, with the C(role) name, the C(ability) and the
+    C(app_scope_id)
+  returned: always
+  type: list
+created:
+  description: Names of the roles created
+  returned: always
+  type: list
+deleted:
+  description: Names of the roles deleted
+  returned: always
+  type: list
+extra_capabilities:
+  description: Capabilities of the roles of the catalog that are not in the catalog
+    and cannot be removed through the API
+  returned: always
+  type: list
+failed_operations:
+  description: Operations that were rejected by the API, with the reason
+  returned: on failure
+  type: list
+unchanged:
+  description: Number of roles whose description and capability hash already
+    matched the catalog
+  returned: always
+  type: int
+updated:
+  description: Names of the roles whose description was updated
+  returned: always
+  type: list
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.tetration.api import TetrationApiModule
+from ansible.module_utils.tetration.api import TETRATION_API_ROLE
+from ansible.module_utils.tetration.api import TETRATION_API_SCOPES
+from ansible.module_utils.tetration.users import TETRATION_ROLE_CAPABILITIES
+from ansible.module_utils.tetration.users import capability_set
+from ansible.module_utils.tetration.users import capability_set_hash
+from ansible.module_utils.tetration.users import operation_rounds
+
+CAPABILITY_SPEC = dict(
+    ability=dict(type='str', required=True, choices=sorted(TETRATION_ROLE_CAPABILITIES)),
+    app_scope_id=dict(type='str', required=False),
+    app_scope_name=dict(type='str', required=False),
+)
+
+ROLE_SPEC = dict(
+    name=dict(type='str', required=True),
+    description=dict(type='str', required=False),
+    app_scope_id=dict(type='str', required=False),
+    app_scope_name=dict(type='str', required=False),
+    capabilities=dict(type='list', elements='dict', options=CAPABILITY_SPEC, required=False),
+    state=dict(type='str', required=False, choices=['present', 'absent'], default='present'),
+)
+
+
+def main():
+    tetration_spec=dict(
+        roles=dict(type='list', elements='dict', options=ROLE_SPEC, required=True),
+        purge=dict(type='bool', required=False, default=False),
+        concurrency=dict(type='int', required=False, default=8),
+    )
+
+    argument_spec = dict(
+        provider=dict(required=True),
+    )
+
+    argument_spec.update(tetration_spec)
+    argument_spec.update(TetrationApiModule.provider_spec)
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+    )
+
+    tet_module = TetrationApiModule(module)
+
+    # These are all elements we put in our return JSON object for clarity
+    result = dict(
+        changed=False,
+        created=[],
+        updated=[],
+        deleted=[],
+        capabilities_added=[],
+        extra_capabilities=[],
+        unchanged=0,
+    )
+
+    desired_roles = module.params['roles']
+    purge = module.params['purge']
+    concurrency = module.params['concurrency']
+
+    # =========================================================================
+    # Get current state of all roles with a single call
+    existing_roles = tet_module.run_method(
+        method_name = 'get',
+        target = TETRATION_API_ROLE
+    ) or []
+    existing_roles = dict(((role.get('app_scope_id') or '', role['name']), role) for role in existing_roles)
+
+    scope_ids_by_name = dict()
+    if any(desired['app_scope_name'] or any(capability['app_scope_name'] for capability in desired['capabilities'] or [])
+           for desired in desired_roles):
+        app_scopes = tet_module.run_method(
+            method_name = 'get',
+            target = TETRATION_API_SCOPES
+        ) or []
+        scope_ids_by_name = dict((scope['name'], scope['id']) for scope in app_scopes)
+
+    def scope_id(item, label, default=''):
+        if item['app_scope_name']:
+            if item['app_scope_name'] not in scope_ids_by_name:
+                module.fail_json(msg='Unable to find existing app scope named %s for role: %s' % (item['app_scope_name'], label))
+            return scope_ids_by_name[item['app_scope_name']]
+        return item['app_scope_id'] or default
+
+    # =========================================================================
+    # Resolve the catalog
+    catalog = []
+    managed_keys = set()
+    managed_scope_ids = set()
+    for desired in desired_roles:
+        key = (scope_id(desired, desired['name']), desired['name'])
+        if key in managed_keys:
+            module.fail_json(msg='Role %s is listed more than once for scope: %s' % (desired['name'], key[0]))
+        managed_keys.add(key)
+        managed_scope_ids.add(key[0])
+        # capabilities apply to the scope of the role unless given another one
+        capabilities = set(
+            (TETRATION_ROLE_CAPABILITIES[capability['ability']], scope_id(capability, desired['name'], key[0]))
+            for capability in desired['capabilities'] or []
+        )
+        if any(not app_scope_id for _, app_scope_id in capabilities):
+            module.fail_json(msg='app_scope_id or app_scope_name is required for the capabilities of '
+                                 'service provider role: %s' % desired['name'])
+        catalog.append((key, desired, capabilities))
+
+    # the roles list may not include the capabilities, in which case the roles
+    # of the catalog are read one by one in parallel
+    missing = [existing_roles[key] for key, desired, _ in catalog
+               if desired['state'] == 'present' and key in existing_roles
+               and 'capabilities' not in existing_roles[key]]
+    responses = tet_module.run_method_batch([
+        dict(method_name = 'get', target = '%s/%s' % (TETRATION_API_ROLE, role['id']))
+        for role in missing
+    ], concurrency = concurrency)
+    for role, response in zip(missing, responses):
+        if not response['ok']:
+            module.fail_json(msg='Unable to retrieve role %s: %s' % (role['name'], response['msg']),
+                             code=response['status_code'])
+        role['capabilities'] = (response['json'] or dict()).get('capabilities') or []
+
+    # =========================================================================
+    # Compute the difference between the catalog and the roles
+    operations = []
+    capability_changes = []
+    for key, desired, capabilities in catalog:
+        existing_object = existing_roles.get(key)
+        name = desired['name']
+
+        if desired['state'] == 'absent':
+            if existing_object:
+                operations.append(('deleted', key, dict(
+                    method_name = 'delete',
+                    target = '%s/%s' % (TETRATION_API_ROLE, existing_object['id'])
+                )))
+            continue
+
+        if not existing_object:
+            new_object = dict(name = name)
+            if desired['description'] is not None:
+                new_object['description'] = desired['description']
+            if key[0]:
+                new_object['app_scope_id'] = key[0]
+            operations.append(('created', key, dict(
+                method_name = 'post',
+                target = TETRATION_API_ROLE,
+                req_payload = new_object
+            )))
+            capability_changes.extend((key, capability) for capability in sorted(capabilities))
+            continue
+
+        description_changed = desired['description'] is not None and existing_object.get('description') != desired['description']
+        if description_changed:
+            operations.append(('updated', key, dict(
+                method_name = 'put',
+                target = '%s/%s' % (TETRATION_API_ROLE, existing_object['id']),
+                req_payload = dict(name = name, description = desired['description'])
+            )))
+        current = capability_set(existing_object['capabilities'])
+        if capability_set_hash(current) == capability_set_hash(capabilities):
+            if not description_changed:
+                result['unchanged'] += 1
+            continue
+        capability_changes.extend((key, capability) for capability in sorted(capabilities - current))
+        result['extra_capabilities'].extend(
+            dict(role = name, ability = ability, app_scope_id = app_scope_id)
+            for ability, app_scope_id in sorted(current - capabilities)
+        )
+
+    if purge:
+        for key, existing_object in existing_roles.items():
+            if key[0] in managed_scope_ids and key not in managed_keys:
+                operations.append(('deleted', key, dict(
+                    method_name = 'delete',
+                    target = '%s/%s' % (TETRATION_API_ROLE, existing_object['id'])
+                )))
+
+    result['changed'] = bool(operations or capability_changes)
+    if module.check_mode:
+        for action, key, _ in operations:
+            result[action].append(key[1])
+        for key, (ability, app_scope_id) in capability_changes:
+            result['capabilities_added'].append(dict(role = key[1], ability = ability, app_scope_id = app_scope_id))
+        module.exit_json(**result)
+
+    # =========================================================================
+    # Now create, update and delete the roles in parallel
+    failed_operations = []
+    failed_keys = set()
+    role_ids = dict((key, role['id']) for key, role in existing_roles.items())
+    responses = tet_module.run_method_batch(
+        [operation for (_, _, operation) in operations],
+        concurrency = concurrency
+    )
+    for (action, key, operation), response in zip(operations, responses):
+        if not response['ok'] or (action == 'created' and not (response['json'] or dict()).get('id')):
+            failed_keys.add(key)
+            failed_operations.append(dict(
+                name = key[1],
+                app_scope_id = key[0],
+                operation = action,
+                code = response['status_code'],
+                msg = response.get('msg')
+            ))
+            continue
+        if action == 'created':
+            role_ids[key] = response['json']['id']
+        result[action].append(key[1])
+
+    # =========================================================================
+    # Then add the missing capabilities, one call at a time for each role
+    capability_changes = [change for change in capability_changes if change[0] not in failed_keys]
+    for batch in operation_rounds(capability_changes, key=lambda change: change[0]):
+        responses = tet_module.run_method_batch([
+            dict(
+                method_name = 'post',
+                target = '%s/%s/capabilities' % (TETRATION_API_ROLE, role_ids[key]),
+                req_payload = dict(app_scope_id = app_scope_id, ability = ability)
+            ) for key, (ability, app_scope_id) in batch
+        ], concurrency = concurrency)
+        for (key, (ability, app_scope_id)), response in zip(batch, responses):
+            if response['ok']:
+                result['capabilities_added'].append(dict(role = key[1], ability = ability, app_scope_id = app_scope_id))
+            else:
+                failed_operations.append(dict(
+                    name = key[1],
+                    app_scope_id = key[0],
+                    operation = 'capability %s on %s' % (ability, app_scope_id),
+                    code = response['status_code'],
+                    msg = response['msg']
+                ))
+
+    if failed_operations:
+        module.fail_json(msg='%d role operations failed' % len(failed_operations),
+                         failed_operations=failed_operations, **result)
+
+    module.exit_json(**result)
+
+if __name__ == '__main__':
+    main()
@@ -20,9 +20,21 @@ notes:
 - Requires the tetpyclient Python module.
 - Supports check mode.
 options:
+  count_only:
+    default: 'false'
+    description:
+    - When true, only the number of matching scopes is returned in C(count)
+    - Only used when C(query_type) is tenant or sub-scope
+    type: bool
   description:
     description: User specified description of the scope
     type: string
+  max_depth:
+    description:
+    - Maximum depth below the queried scope to return, 0 returning only the scope
+      itself
+    - Only used when C(query_type) is tenant or sub-scope
+    type: int
   parent_app_id:
     description:
     - ID of the parent scope
@@ -98,10 +110,27 @@ tetration_scope:
       host: "tetration-cluster@company.com"
       api_key: 1234567890QWERTY
       api_secret: 1234567890QWERTY
+
+# Count the scopes of a tenant down to two levels below the root
+tetration_scope:
+    scope_name: ACME
+    state: query
+    query_type: tenant
+    max_depth: 2
+    count_only: true
+    provider:
+      host: "tetration-cluster@company.com"
+      api_key: 1234567890QWERTY
+      api_secret: 1234567890QWERTY
 '''
 
 RETURN = r'''
 ---
+count:
+  description: Number of scopes matching the query
+  returned: when C(state) is query and C(query_type) is tenant or sub-scope
+  sample: 12
+  type: int
 object:
   contains:
     child_app_scope_ids:
@@ -193,6 +222,8 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.six import iteritems, iterkeys
 from ansible.module_utils.tetration.api import TetrationApiModule
 from ansible.module_utils.tetration.api import TETRATION_API_SCOPES
+from ansible.module_utils.tetration.query import queries_equal
+from ansible.module_utils.tetration.scope_tree import TetrationScopeTree
 
 def main():
     ''' Main entry point for module execution
@@ -208,6 +239,8 @@ def main():
         short_query=dict(type='dict', required=False),
         policy_priority=dict(type='int', required=False),
         query_type=dict(type='str', required=False, choices=['single', 'tenant', 'sub-scope'], default='single'),
+        max_depth=dict(type='int', required=False),
+        count_only=dict(type='bool', required=False, default=False),
     )
     # Common spec for tetration modules
     argument_spec = dict(
@@ -246,6 +279,8 @@ def main():
     short_query = module.params['short_query']
     policy_priority = module.params['policy_priority']
     query_type = module.params['query_type']
+    max_depth = module.params['max_depth']
+    count_only = module.params['count_only']
     parent_scope = None
     existing_scope = None
 
@@ -294,7 +329,7 @@ def main():
     if state == 'present':
         if existing_scope:
             new_object = dict()
-            for (k,v) in existing_scope.iteritems():
+            for (k,v) in iteritems(existing_scope):
                 if module.params.get(k) and v != module.params.get(k):
                     new_object[k] = module.params.get(k)
                 else:
@@ -320,6 +355,9 @@ def main():
         else:
             del new_object['parent_app_scope_id']
             del new_object['policy_priority']
+            # an equivalent query written differently is not a change
+            if short_query and queries_equal(short_query, existing_scope['short_query']):
+                new_object['short_query'] = existing_scope['short_query']
             result['changed'] = tet_module.filter_object(new_object, existing_scope, check_only=True)
             if result['changed']:
                 if not check_mode:
@@ -361,26 +399,18 @@ def main():
     # ---------------------------------
     else:
         if existing_scope:
-            if query_type == 'tenant':
-                if existing_scope['id'] == existing_scope['root_app_scope_id']:
-                    tenant_scopes = tet_module.get_object(
-                        search_array = app_scopes,
-                        filter = dict(root_app_scope_id=existing_scope['id']),
-                        allow_multiple = True
-                    )
-                    tenant_scopes.sort( key=lambda x: len(str(x['name']).split(':')) )
-                    result['object'] = tenant_scopes
+            if query_type == 'tenant' and existing_scope['id'] != existing_scope['root_app_scope_id']:
+                module.fail_json(msg='Scope name: %s is not a root scope' % existing_scope['short_name'])
+            if query_type in ['tenant', 'sub-scope']:
+                # walking the tree breadth first yields the scopes already
+                # sorted by depth
+                tree = TetrationScopeTree(app_scopes)
+                target_scopes = (scope for (depth, scope) in tree.walk(existing_scope['id'], max_depth=max_depth))
+                if count_only:
+                    result['count'] = sum(1 for scope in target_scopes)
                 else:
-                    module.fail_json(msg='Scope name: %s is not a root scope' % existing_scope['short_name'])
-            elif query_type == 'sub-scope':
-                tenant_scopes = tet_module.get_object(
-                    search_array = app_scopes,
-                    filter = dict(root_app_scope_id=existing_scope['root_app_scope_id']),
-                    allow_multiple = True
-                )
-                target_scopes = [ s for s in tenant_scopes if s['name'].startswith(existing_scope['name']) ]
-                target_scopes.sort( key=lambda x: len(str(x['name']).split(':')) )
-                result['object'] = target_scopes
+                    result['object'] = list(target_scopes)
+                    result['count'] = len(result['object'])
             else:
                 result['object'] = existing_scope
         else:
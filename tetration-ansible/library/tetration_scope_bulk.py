@@ -0,0 +1,305 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+
+DOCUMENTATION = r'''
+---
+author: Tetration Ansible Contributors
+description:
+- Applies a whole scope tree of a tenant in a single task.
+- Scopes are retrieved once and compared against the desired tree. Creates are
+  applied parent first and deletes child first, and the scopes of one tree level
+  are processed in parallel.
+extends_documentation_fragment: tetration
+module: tetration_scope_bulk
+notes:
+- Requires the tetpyclient Python module.
+- Supports check mode.
+options:
+  concurrency:
+    default: 8
+    description: Maximum number of API calls executed in parallel
+    type: int
+  purge:
+    default: 'false'
+    description:
+    - When true, scopes below C(root_scope_name) that are not listed in C(scopes)
+      are deleted
+    - Scopes that are parents of a listed scope are kept
+    type: bool
+  root_scope_name:
+    description: Name of the root scope of the tenant. Every scope in C(scopes) must
+      be below this scope
+    required: true
+    type: string
+  scopes:
+    description:
+    - List of desired scopes
+    - Each item accepts C(name) (fully qualified scope name), C(description),
+      C(short_query), C(policy_priority) and C(state)
+    - As with M(tetration_scope), C(policy_priority) is only applied when the
+      scope is created
+    required: true
+    type: list
+requirements: tetpyclient
+version_added: '2.8'
+'''
+
+EXAMPLES = r'''
+# Build a tenant tree, deleting any scope that is not listed
+tetration_scope_bulk:
+    root_scope_name: ACME
+    purge: true
+    scopes:
+    - name: ACME:Example
+      short_query:
+        type: subnet
+        field: ip
+        value: 172.16.0.0/12
+    - name: ACME:Example:Application
+      description: Scope for ACME example application
+      short_query:
+        type: subnet
+        field: ip
+        value: 172.16.10.0/24
+    provider:
+      host: "tetration-cluster@company.com"
+      api_key: 1234567890QWERTY
+      api_secret: 1234567890QWERTY
+'''
+
+RETURN = r'''
+---
+created:
+  description: Fully qualified names of the scopes that were created
+  returned: always
+  type: list
+deleted:
+  description: Fully qualified names of the scopes that were deleted
+  returned: always
+  type: list
+failed_operations:
+  description: Operations that were rejected by the API, with the reason
+  returned: on failure
+  type: list
+updated:
+  description: Fully qualified names of the scopes that were updated
+  returned: always
+  type: list
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.tetration.api import TetrationApiModule
+from ansible.module_utils.tetration.api import TETRATION_API_SCOPES
+from ansible.module_utils.tetration.query import queries_equal
+from ansible.module_utils.tetration.scope_tree import TetrationScopeTree
+from ansible.module_utils.tetration.scope_tree import parent_scope_name
+from ansible.module_utils.tetration.scope_tree import scope_depth
+
+SCOPE_SPEC = dict(
+    name=dict(type='str', required=True),
+    description=dict(type='str', required=False),
+    short_query=dict(type='dict', required=False),
+    policy_priority=dict(type='int', required=False),
+    state=dict(type='str', required=False, choices=['present', 'absent'], default='present'),
+)
+
+
+def main():
+    ''' Main entry point for module execution
+    '''
+    #
+    # Module specific spec
+    tetration_spec = dict(
+        root_scope_name=dict(type='str', required=True),
+        scopes=dict(type='list', elements='dict', options=SCOPE_SPEC, required=True),
+        purge=dict(type='bool', required=False, default=False),
+        concurrency=dict(type='int', required=False, default=8),
+    )
+    # Common spec for tetration modules
+    argument_spec = dict(
+        provider=dict(required=True),
+    )
+
+    # Combine specs and include provider parameter
+    argument_spec.update(tetration_spec)
+    argument_spec.update(TetrationApiModule.provider_spec)
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+    )
+    tet_module = TetrationApiModule(module)
+    result = dict(
+        changed=False,
+        created=[],
+        updated=[],
+        deleted=[],
+    )
+
+    check_mode = module.check_mode
+    root_scope_name = module.params['root_scope_name']
+    desired_scopes = module.params['scopes']
+    purge = module.params['purge']
+    concurrency = module.params['concurrency']
+
+    # =========================================================================
+    # Get current state of all scopes with a single call
+    app_scopes = tet_module.run_method(
+        method_name = 'get',
+        target = TETRATION_API_SCOPES
+    )
+    tree = TetrationScopeTree(app_scopes)
+    root_scope = tree.by_name.get(root_scope_name)
+    if not root_scope:
+        module.fail_json(msg='Unable to find root scope with name: %s' % root_scope_name)
+
+    # =========================================================================
+    # Compute the difference, grouping creates and deletes by tree level
+    desired_by_name = dict()
+    for desired in desired_scopes:
+        if not desired['name'].startswith(root_scope_name + ':'):
+            module.fail_json(msg='Scope %s is not below root scope %s' % (desired['name'], root_scope_name))
+        if desired['name'] in desired_by_name:
+            module.fail_json(msg='Scope %s is listed more than once' % desired['name'])
+        desired_by_name[desired['name']] = desired
+
+    updates = []
+    creates_by_depth = dict()
+    deletes_by_depth = dict()
+    for name, desired in desired_by_name.items():
+        existing_scope = tree.by_name.get(name)
+        if desired['state'] == 'absent':
+            if existing_scope:
+                deletes_by_depth.setdefault(scope_depth(name), []).append(existing_scope)
+            continue
+        if existing_scope:
+            new_object = dict(
+                short_name = existing_scope['short_name'],
+                description = existing_scope['description'],
+                short_query = existing_scope['short_query'],
+            )
+            update_needed = False
+            if desired['description'] is not None and desired['description'] != existing_scope['description']:
+                new_object['description'] = desired['description']
+                update_needed = True
+            if desired['short_query'] is not None and not queries_equal(desired['short_query'], existing_scope['short_query']):
+                new_object['short_query'] = desired['short_query']
+                update_needed = True
+            if update_needed:
+                updates.append((name, dict(
+                    method_name = 'put',
+                    target = '%s/%s' % (TETRATION_API_SCOPES, existing_scope['id']),
+                    req_payload = new_object
+                )))
+            continue
+        parent_name = parent_scope_name(name)
+        parent_desired = desired_by_name.get(parent_name)
+        if parent_name not in tree.by_name and not (parent_desired and parent_desired['state'] == 'present'):
+            module.fail_json(msg='Unable to find parent scope with name: %s' % parent_name)
+        creates_by_depth.setdefault(scope_depth(name), []).append(desired)
+
+    if purge:
+        # the parents of a listed scope cannot be deleted while it exists
+        kept_names = set()
+        for name, desired in desired_by_name.items():
+            if desired['state'] == 'present':
+                parent_name = parent_scope_name(name)
+                while parent_name and parent_name not in kept_names:
+                    kept_names.add(parent_name)
+                    parent_name = parent_scope_name(parent_name)
+        for depth, existing_scope in tree.walk(root_scope['id']):
+            if depth > 0 and existing_scope['name'] not in desired_by_name and existing_scope['name'] not in kept_names:
+                deletes_by_depth.setdefault(scope_depth(existing_scope['name']), []).append(existing_scope)
+
+    result['changed'] = bool(updates or creates_by_depth or deletes_by_depth)
+
+    # =========================================================================
+    # Now apply the changes
+    failed_operations = []
+
+    def run_level(names, operations):
+        ''' Runs the operations of one tree level in parallel and returns the
+        names that succeeded along with their responses
+        '''
+        if check_mode:
+            return [(name, None) for name in names]
+        responses = tet_module.run_method_batch(operations, concurrency=concurrency)
+        succeeded = []
+        for name, operation, response in zip(names, operations, responses):
+            if response['ok']:
+                succeeded.append((name, response['json']))
+            else:
+                failed_operations.append(dict(
+                    name = name,
+                    operation = operation['method_name'],
+                    code = response['status_code'],
+                    msg = response['msg']
+                ))
+        return succeeded
+
+    # updates do not depend on each other so they are applied in one batch
+    for name, _ in run_level([name for (name, _) in updates], [operation for (_, operation) in updates]):
+        result['updated'].append(name)
+
+    # creates are applied parent first, each level using the ids of the
+    # scopes created by the level above
+    scope_ids = dict((name, scope['id']) for (name, scope) in tree.by_name.items())
+    for depth in sorted(creates_by_depth):
+        names = []
+        operations = []
+        for desired in creates_by_depth[depth]:
+            parent_name = parent_scope_name(desired['name'])
+            if parent_name not in scope_ids and not check_mode:
+                failed_operations.append(dict(
+                    name = desired['name'],
+                    operation = 'post',
+                    code = None,
+                    msg = 'Parent scope %s could not be created' % parent_name
+                ))
+                continue
+            names.append(desired['name'])
+            operations.append(dict(
+                method_name = 'post',
+                target = TETRATION_API_SCOPES,
+                req_payload = dict(
+                    short_name = desired['name'].split(':')[-1],
+                    description = desired['description'],
+                    short_query = desired['short_query'],
+                    parent_app_scope_id = scope_ids.get(parent_name),
+                    policy_priority = desired['policy_priority']
+                )
+            ))
+        for name, created_scope in run_level(names, operations):
+            if created_scope:
+                scope_ids[name] = created_scope['id']
+            result['created'].append(name)
+
+    # deletes are applied child first
+    for depth in sorted(deletes_by_depth, reverse=True):
+        scopes = deletes_by_depth[depth]
+        operations = [
+            dict(method_name = 'delete', target = '%s/%s' % (TETRATION_API_SCOPES, scope['id']))
+            for scope in scopes
+        ]
+        for name, _ in run_level([scope['name'] for scope in scopes], operations):
+            result['deleted'].append(name)
+
+    if failed_operations:
+        module.fail_json(msg='%d scope operations failed' % len(failed_operations),
+                         failed_operations=failed_operations, **result)
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = r'''
+---
+author: Tetration Ansible Contributors
+description:
+- Reports the objects added, removed and modified between two snapshots written
+  by M(tetration_snapshot_export), for example to review what changed in a tenant
+  since the previous day.
+- Every scope and application of a snapshot carries a hash of its objects,
+  policies and children. Subtrees with the same hash in both snapshots are
+  skipped without reading them, so the comparison time depends on the amount of
+  change rather than on the size of the tenant.
+module: tetration_snapshot_drift
+notes:
+- Supports check mode.
+- This module only reads the snapshots and never calls the Tetration API.
+options:
+  base:
+    description: Path of the older snapshot
+    required: true
+    type: path
+  collections:
+    description:
+    - Kinds of objects reported, such as C(scopes), C(inventory_filters) or
+      C(policies)
+    - All kinds are reported by default
+    type: list
+  target:
+    description: Path of the newer snapshot
+    required: true
+    type: path
+version_added: '2.8'
+'''
+
+EXAMPLES = r'''
+# Hourly drift report of the Default tenant
+- tetration_snapshot_export:
+    root_scope_name: Default
+    dest: "output/default-{{ ansible_date_time.epoch }}.sqlite"
+    provider: "{{ my_tetration }}"
+  register: snapshot
+  delegate_to: localhost
+
+- tetration_snapshot_drift:
+    base: output/default-previous.sqlite
+    target: "{{ snapshot.dest }}"
+  register: drift
+  delegate_to: localhost
+
+- debug:
+    var: drift.summary
+'''
+
+RETURN = r'''
+---
+added:
+  description: Objects only found in the target snapshot, with their C(kind), C(id)
+    and C(name)
+  returned: always
+  type: list
+identical:
+  description: True when both snapshots hold the same objects
+  returned: always
+  type: bool
+modified:
+  description: Objects found in both snapshots with a different content, with
+    the C(fields) that differ
+  returned: always
+  sample: [{"kind": "scopes", "id": "5ce480db497d4f1ba6ad2b1e", "name": "Default:Apps", "fields": ["short_query"]}]
+  type: list
+nodes:
+  description: Number of scopes and applications C(compared) and of identical
+    subtrees C(skipped)
+  returned: always
+  type: dict
+removed:
+  description: Objects only found in the base snapshot
+  returned: always
+  type: list
+summary:
+  description: Number of objects added, removed and modified per kind
+  returned: always
+  sample: {"inventory_filters": {"added": 2, "removed": 0, "modified": 1}}
+  type: dict
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils._text import to_text
+from ansible.module_utils.tetration.drift import TetrationSnapshotDrift
+from ansible.module_utils.tetration.snapshot import TetrationSnapshot
+
+
+def main():
+    argument_spec = dict(
+        base=dict(type='path', required=True),
+        target=dict(type='path', required=True),
+        collections=dict(type='list', required=False),
+    )
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+    )
+
+    # These are all elements we put in our return JSON object for clarity
+    result = dict(
+        changed=False,
+        identical=True,
+    )
+
+    snapshots = []
+    try:
+        for path in (module.params['base'], module.params['target']):
+            snapshots.append(TetrationSnapshot.open(path))
+        drift = TetrationSnapshotDrift(*snapshots).compare(kinds=module.params['collections'])
+    except Exception as exc:
+        module.fail_json(msg='Unable to compare snapshots: %s' % to_text(exc))
+    finally:
+        for snapshot in snapshots:
+            snapshot.close()
+
+    result['added'] = drift.added
+    result['removed'] = drift.removed
+    result['modified'] = drift.modified
+    result['summary'] = drift.summary()
+    result['nodes'] = dict(compared=drift.nodes_compared, skipped=drift.nodes_skipped)
+    result['identical'] = not (drift.added or drift.removed or drift.modified)
+
+    module.exit_json(**result)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = r'''
+---
+author: Tetration Ansible Contributors
+description:
+- Exports the configuration of a tenant to a local SQLite snapshot, so that
+  reports and audits can query it offline instead of querying the cluster.
+- Scopes, inventory filters, applications with the policies and l4_params of
+  their latest version, agent config profiles and intents, interface intents,
+  NAT configs, users (including disabled ones), roles and tenants are retrieved
+  concurrently. Paged collections are followed until their last page.
+- Objects are stored as JSON in the C(objects) table, indexed by C(kind), C(id)
+  and C(name), and policies in the C(policies) table, indexed by application and
+  by consumer and provider filter.
+- The snapshot file is replaced atomically once complete.
+- The snapshot can then be given as the C(snapshot) provider option to plan a
+  playbook in check mode without any API call.
+extends_documentation_fragment: tetration
+module: tetration_snapshot_export
+notes:
+- Requires the tetpyclient Python module.
+- Supports check mode.
+options:
+  collections:
+    choices: '[scopes, inventory_filters, applications, agent_config_profiles, agent_config_intents,
+      interface_intents, agent_nat_configs, users, roles, tenants]'
+    description: Collections exported, all of them by default
+    type: list
+  concurrency:
+    default: 8
+    description: Maximum number of API calls executed in parallel
+    type: int
+  dest:
+    description: Path of the SQLite snapshot written
+    required: true
+    type: path
+  root_scope_name:
+    description:
+    - Name of the root scope of the tenant exported
+    - Objects attached to another root scope are left out. By default the objects
+      of every tenant visible with the API key are exported
+    type: string
+requirements: tetpyclient
+version_added: '2.8'
+'''
+
+EXAMPLES = r'''
+# Snapshot the whole configuration of the Default tenant
+- tetration_snapshot_export:
+    root_scope_name: Default
+    dest: output/default.sqlite
+    provider: "{{ my_tetration }}"
+  delegate_to: localhost
+
+# Only scopes and inventory filters
+- tetration_snapshot_export:
+    root_scope_name: Default
+    collections:
+    - scopes
+    - inventory_filters
+    dest: output/default-filters.sqlite
+    provider: "{{ my_tetration }}"
+  delegate_to: localhost
+'''
+
+RETURN = r'''
+---
+counts:
+  description: Number of objects exported per collection, and of policies
+  returned: always
+  sample: {"scopes": 42, "inventory_filters": 310, "applications": 12, "policies": 1870}
+  type: dict
+dest:
+  description: Path of the snapshot
+  returned: always
+  type: string
+'''
+
+from datetime import datetime
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils._text import to_text
+from ansible.module_utils.tetration.api import TetrationApiModule
+from ansible.module_utils.tetration.api import TETRATION_API_APPLICATIONS
+from ansible.module_utils.tetration.scope_tree import TetrationScopeTree
+from ansible.module_utils.tetration.snapshot import TetrationSnapshot
+from ansible.module_utils.tetration.snapshot import TETRATION_SNAPSHOT_COLLECTIONS
+from ansible.module_utils.tetration.snapshot import collection_items
+
+
+def main():
+    tetration_spec=dict(
+        dest=dict(type='path', required=True),
+        root_scope_name=dict(type='str', required=False),
+        collections=dict(type='list', required=False,
+                         choices=[kind for kind, _ in TETRATION_SNAPSHOT_COLLECTIONS]),
+        concurrency=dict(type='int', required=False, default=8),
+    )
+
+    argument_spec = dict(
+        provider=dict(required=True),
+    )
+
+    argument_spec.update(tetration_spec)
+    argument_spec.update(TetrationApiModule.provider_spec)
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+    )
+
+    tet_module = TetrationApiModule(module)
+
+    # These are all elements we put in our return JSON object for clarity
+    result = dict(
+        changed=False,
+        dest=module.params['dest'],
+        counts=dict(),
+    )
+
+    dest = module.params['dest']
+    root_scope_name = module.params['root_scope_name']
+    concurrency = module.params['concurrency']
+    kinds = module.params['collections'] or [kind for kind, _ in TETRATION_SNAPSHOT_COLLECTIONS]
+    # scopes are needed to tell which objects belong to the tenant
+    fetched = [(kind, target) for kind, target in TETRATION_SNAPSHOT_COLLECTIONS
+               if kind in kinds or (kind == 'scopes' and root_scope_name)]
+
+    # =========================================================================
+    # Retrieve every collection concurrently, with all of their pages
+    responses = tet_module.run_method_batch_paginated([
+        dict(
+            method_name = 'get',
+            target = target,
+            params = dict(include_disabled='true') if kind == 'users' else None
+        ) for kind, target in fetched
+    ], concurrency=concurrency)
+    collections = dict()
+    for (kind, target), response in zip(fetched, responses):
+        if not response['ok']:
+            module.fail_json(
+                msg='Unable to retrieve %s: %s' % (target, response['msg']),
+                code=response['status_code']
+            )
+        collections[kind] = collection_items(response['json'])
+
+    # =========================================================================
+    # Keep only the objects of the tenant
+    if root_scope_name:
+        scope_tree = TetrationScopeTree(collections['scopes'])
+        root_scope = scope_tree.by_name.get(root_scope_name)
+        if not root_scope:
+            module.fail_json(msg='Unable to find root scope named: %s' % root_scope_name)
+        tenant_scope_ids = set(scope['id'] for _, scope in scope_tree.walk(root_scope['id']))
+
+        def in_tenant(obj):
+            if not isinstance(obj, dict):
+                return True
+            if obj.get('root_app_scope_id'):
+                return obj['root_app_scope_id'] == root_scope['id']
+            if obj.get('app_scope_id'):
+                return obj['app_scope_id'] in tenant_scope_ids
+            return True
+
+        for kind in collections:
+            if kind == 'tenants':
+                continue
+            collections[kind] = [obj for obj in collections[kind] if in_tenant(obj)]
+        if 'scopes' not in kinds:
+            del collections['scopes']
+
+    # =========================================================================
+    # Retrieve the latest version of every application with its policies
+    applications = collections.get('applications') or []
+    responses = tet_module.run_method_batch([
+        dict(
+            method_name = 'get',
+            target = '%s/%s/details' % (TETRATION_API_APPLICATIONS, application['id'])
+        ) for application in applications
+    ], concurrency=concurrency)
+    for application, response in zip(applications, responses):
+        if not response['ok']:
+            module.fail_json(
+                msg='Unable to retrieve details for application: %s' % application['id'],
+                code=response['status_code']
+            )
+    app_details = [response['json'] or dict() for response in responses]
+
+    for kind, objects in collections.items():
+        result['counts'][kind] = len(objects)
+    result['counts']['policies'] = sum(
+        len(details.get(section) or [])
+        for details in app_details
+        for section in ('absolute_policies', 'default_policies')
+    )
+    result['changed'] = True
+    if module.check_mode:
+        module.exit_json(**result)
+
+    # =========================================================================
+    # Write the snapshot
+    try:
+        snapshot = TetrationSnapshot.create(dest)
+    except (IOError, OSError) as exc:
+        module.fail_json(msg='Unable to create snapshot %s: %s' % (dest, exc))
+    try:
+        snapshot.set_metadata(
+            created=datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+            server_endpoint=getattr(tet_module.rc, 'server_endpoint', None),
+            root_scope_name=root_scope_name,
+            collections=sorted(collections),
+            counts=result['counts']
+        )
+        for kind, objects in collections.items():
+            snapshot.add_objects(kind, objects)
+        snapshot.add_objects('application_details', [
+            dict(details, id=application['id']) for application, details in zip(applications, app_details)
+        ])
+        for application, details in zip(applications, app_details):
+            snapshot.add_policies(application['id'], application.get('latest_adm_version'), details)
+        snapshot.commit()
+    except Exception as exc:
+        snapshot.close()
+        module.fail_json(msg='Unable to write snapshot %s: %s' % (dest, to_text(exc)))
+
+    module.exit_json(**result)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = r'''
+---
+author: Tetration Ansible Contributors
+description:
+- Creates, enables, updates and disables many Cisco Tetration user accounts in a
+  single task, for example to synchronize the accounts with an identity provider.
+- Users, including disabled ones, and roles are retrieved once and indexed by
+  email, id and name. Only the accounts that differ from the desired list are
+  changed, in parallel.
+- Changes are applied in three steps, accounts are created, enabled or disabled
+  first, then updated, then given their missing roles, so that the calls made
+  for one user never run concurrently.
+extends_documentation_fragment: tetration
+module: tetration_user_bulk
+notes:
+- Requires the tetpyclient Python module.
+- Supports check mode.
+- Roles are only added, never removed.
+options:
+  concurrency:
+    default: 8
+    description: Maximum number of API calls executed in parallel
+    type: int
+  users:
+    description:
+    - List of desired user accounts
+    - Each item accepts C(email), C(first_name), C(last_name), C(app_scope_id) and
+      C(app_scope_name) as in M(tetration_user), C(role_ids) and C(role_names) to
+      give roles to the user, and C(state) (present or absent)
+    - C(first_name) and C(last_name) are required to create a user
+    - Role names are looked up among the roles of the scope of the user first
+    required: true
+    type: list
+requirements: tetpyclient
+version_added: '2.8'
+'''
+
+EXAMPLES = r'''
+# Onboard and offboard the accounts exported from the identity provider
+- tetration_user_bulk:
+    provider: "{{ my_tetration }}"
+    concurrency: 16
+    users:
+    - email: bsmith@example.com
+      first_name: Bob
+      last_name: Smith
+      app_scope_name: Default
+      role_names:
+      - Default Read Only
+    - email: jdoe@example.com
+      state: absent
+'''
+
+RETURN = r'''
+---
+created:
+  description: Emails of the users created
+  returned: always
+  type: list
+disabled:
+  description: Emails of the users disabled
+  returned: always
+  type: list
+enabled:
+  description: Emails of the disabled users enabled again
+  returned: always
+  type: list
+failed_operations:
+  description: Operations that were rejected by the API, with the reason. Later
+    changes of the same user are not attempted
+  returned: on failure
+  type: list
+roles_added:
+  description: Roles added to existing users, with the C(email) and C(role_id)
+  returned: always
+  type: list
+updated:
+  description: Emails of the users whose name or scope was updated
+  returned: always
+  type: list
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.tetration.api import TetrationApiModule
+from ansible.module_utils.tetration.api import TETRATION_API_SCOPES
+from ansible.module_utils.tetration.api import TETRATION_API_USER
+from ansible.module_utils.tetration.users import TetrationUserIndex
+from ansible.module_utils.tetration.users import operation_rounds
+
+USER_SPEC = dict(
+    email=dict(type='str', required=True),
+    first_name=dict(type='str', required=False),
+    last_name=dict(type='str', required=False),
+    app_scope_id=dict(type='str', required=False),
+    app_scope_name=dict(type='str', required=False),
+    role_ids=dict(type='list', required=False),
+    role_names=dict(type='list', required=False),
+    state=dict(type='str', required=False, choices=['present', 'absent'], default='present'),
+)
+
+# operations of a step only start once the previous step is complete
+STEPS = (
+    ('created', 'enabled', 'disabled'),
+    ('updated',),
+    ('roles_added',),
+)
+
+
+def main():
+    tetration_spec=dict(
+        users=dict(type='list', elements='dict', options=USER_SPEC, required=True),
+        concurrency=dict(type='int', required=False, default=8),
+    )
+
+    argument_spec = dict(
+        provider=dict(required=True),
+    )
+
+    argument_spec.update(tetration_spec)
+    argument_spec.update(TetrationApiModule.provider_spec)
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+    )
+
+    tet_module = TetrationApiModule(module)
+
+    # These are all elements we put in our return JSON object for clarity
+    result = dict(
+        changed=False,
+        created=[],
+        enabled=[],
+        updated=[],
+        disabled=[],
+        roles_added=[],
+    )
+
+    desired_users = module.params['users']
+    concurrency = module.params['concurrency']
+
+    # =========================================================================
+    # Get current state of all users and roles with one call per collection
+    index = TetrationUserIndex.from_api(tet_module)
+    scope_ids_by_name = dict()
+    if any(desired['app_scope_name'] for desired in desired_users):
+        app_scopes = tet_module.run_method(
+            method_name = 'get',
+            target = TETRATION_API_SCOPES
+        ) or []
+        scope_ids_by_name = dict((scope['name'], scope['id']) for scope in app_scopes)
+
+    # =========================================================================
+    # Compute the difference between desired and current state
+    operations = []
+    emails = set()
+    for desired in desired_users:
+        email = desired['email']
+        if email in emails:
+            module.fail_json(msg='User %s is listed more than once' % email)
+        emails.add(email)
+        existing_object = index.find(email=email)
+        disabled_user = bool(existing_object) and existing_object.get('disabled_at') is not None
+
+        if desired['state'] == 'absent':
+            if existing_object and not disabled_user:
+                operations.append(('disabled', email, dict(
+                    method_name = 'delete',
+                    target = '%s/%s' % (TETRATION_API_USER, existing_object['id'])
+                )))
+            continue
+
+        app_scope_id = desired['app_scope_id']
+        if desired['app_scope_name']:
+            app_scope_id = scope_ids_by_name.get(desired['app_scope_name'])
+            if not app_scope_id or ':' in desired['app_scope_name']:
+                module.fail_json(msg='Unable to find root scope named %s for user: %s' % (desired['app_scope_name'], email))
+
+        role_ids = list(desired['role_ids'] or [])
+        for role_name in desired['role_names'] or []:
+            role_id = index.resolve_role(role_name, app_scope_id)
+            if not role_id:
+                module.fail_json(msg='Unable to find a single role named %s for user: %s' % (role_name, email))
+            role_ids.append(role_id)
+        for role_id in role_ids:
+            if role_id not in index.roles_by_id:
+                module.fail_json(msg='Unable to find role with id %s for user: %s' % (role_id, email))
+
+        new_object = dict(email=email)
+        for k in ['first_name', 'last_name']:
+            if desired[k] is not None:
+                new_object[k] = desired[k]
+        if app_scope_id is not None:
+            new_object['app_scope_id'] = app_scope_id
+
+        if not existing_object:
+            if desired['first_name'] is None or desired['last_name'] is None:
+                module.fail_json(msg='first_name and last_name are required to create user: %s' % email)
+            if role_ids:
+                new_object['role_ids'] = sorted(set(role_ids))
+            operations.append(('created', email, dict(
+                method_name = 'post',
+                target = TETRATION_API_USER,
+                req_payload = new_object
+            )))
+            continue
+
+        if disabled_user:
+            operations.append(('enabled', email, dict(
+                method_name = 'post',
+                target = '%s/%s/enable' % (TETRATION_API_USER, existing_object['id'])
+            )))
+        for k in ['first_name', 'last_name', 'app_scope_id']:
+            if k in new_object and existing_object.get(k) != new_object[k]:
+                operations.append(('updated', email, dict(
+                    method_name = 'put',
+                    target = '%s/%s' % (TETRATION_API_USER, existing_object['id']),
+                    req_payload = new_object
+                )))
+                break
+        existing_roles = set(existing_object.get('role_ids') or [])
+        for role_id in sorted(set(role_ids) - existing_roles):
+            operations.append(('roles_added', email, dict(
+                method_name = 'put',
+                target = '%s/%s/add_role' % (TETRATION_API_USER, existing_object['id']),
+                req_payload = dict(role_id=role_id)
+            )))
+
+    result['changed'] = bool(operations)
+
+    def record(action, email, operation):
+        if action == 'roles_added':
+            result[action].append(dict(email=email, role_id=operation['req_payload']['role_id']))
+        else:
+            result[action].append(email)
+
+    if module.check_mode:
+        for action, email, operation in operations:
+            record(action, email, operation)
+        module.exit_json(**result)
+
+    # =========================================================================
+    # Now apply the changes step by step, in parallel within a step
+    failed_operations = []
+    failed_emails = set()
+    for actions in STEPS:
+        step = [operation for operation in operations
+                if operation[0] in actions and operation[1] not in failed_emails]
+        for batch in operation_rounds(step, key=lambda operation: operation[1]):
+            batch = [operation for operation in batch if operation[1] not in failed_emails]
+            responses = tet_module.run_method_batch(
+                [operation for (_, _, operation) in batch],
+                concurrency = concurrency
+            )
+            for (action, email, operation), response in zip(batch, responses):
+                if response['ok']:
+                    record(action, email, operation)
+                else:
+                    failed_emails.add(email)
+                    failed_operations.append(dict(
+                        email = email,
+                        operation = action,
+                        code = response['status_code'],
+                        msg = response['msg']
+                    ))
+
+    if failed_operations:
+        module.fail_json(msg='%d of %d user operations failed' % (len(failed_operations), len(operations)),
+                         failed_operations=failed_operations, **result)
+
+    module.exit_json(**result)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = r'''
+---
+author: Tetration Ansible Contributors
+description:
+- Adds and removes the roles of many Cisco Tetration users in a single task, for
+  example to apply the outcome of an access review.
+- Users and roles are retrieved once. The roles to add and to remove are the set
+  differences between the desired and the current roles of each user, and are
+  applied in parallel, the calls made for one user running one after the other.
+- Once the changes are applied, users are retrieved once more, without the
+  roles, to verify that every user ended up with the expected roles.
+extends_documentation_fragment: tetration
+module: tetration_user_role_bulk
+notes:
+- Requires the tetpyclient Python module.
+- Supports check mode.
+options:
+  assignments:
+    description:
+    - List of users and of their roles
+    - Each item accepts C(email) or C(user_id) to identify an enabled user,
+      C(role_ids) and C(role_names) for the roles, and C(state). With C(present)
+      the roles are added, with C(absent) they are removed
+    - Role names are looked up among the roles of the scope of the user first
+    required: true
+    type: list
+  concurrency:
+    default: 8
+    description: Maximum number of API calls executed in parallel
+    type: int
+  purge:
+    default: 'false'
+    description:
+    - When true, the roles of the users listed with C(state=present) that are not
+      listed are removed, so that the users end up with exactly the roles given
+    type: bool
+requirements: tetpyclient
+version_added: '2.8'
+'''
+
+EXAMPLES = r'''
+# Apply the quarterly access review
+- tetration_user_role_bulk:
+    provider: "{{ my_tetration }}"
+    purge: true
+    assignments:
+    - email: bsmith@example.com
+      role_names:
+      - Default Read Only
+    - email: jdoe@example.com
+      role_ids:
+      - 5bb7bc06497d4f231c3bd481
+      - 5bb7bc06497d4f231c3bd482
+
+# Revoke one role from a few users without touching their other roles
+- tetration_user_role_bulk:
+    provider: "{{ my_tetration }}"
+    assignments:
+    - email: bsmith@example.com
+      role_names: [Default Admin]
+      state: absent
+    - email: jdoe@example.com
+      role_names: [Default Admin]
+      state: absent
+'''
+
+RETURN = r'''
+---
+added:
+  description: Roles added, with the C(email) of the user and the C(role_id)
+  returned: always
+  type: list
+failed_operations:
+  description: Operations that were rejected by the API, with the reason. Later
+    changes of the same user are not attempted
+  returned: on failure
+  type: list
+mismatches:
+  description: Users whose roles differ from the expected ones after the changes,
+    with the C(expected) and C(actual) role ids
+  returned: on failure
+  type: list
+removed:
+  description: Roles removed, with the C(email) of the user and the C(role_id)
+  returned: always
+  type: list
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.tetration.api import TetrationApiModule
+from ansible.module_utils.tetration.api import TETRATION_API_USER
+from ansible.module_utils.tetration.users import TetrationUserIndex
+from ansible.module_utils.tetration.users import operation_rounds
+
+ASSIGNMENT_SPEC = dict(
+    email=dict(type='str', required=False),
+    user_id=dict(type='str', required=False),
+    role_ids=dict(type='list', required=False),
+    role_names=dict(type='list', required=False),
+    state=dict(type='str', required=False, choices=['present', 'absent'], default='present'),
+)
+
+
+def main():
+    tetration_spec=dict(
+        assignments=dict(type='list', elements='dict', options=ASSIGNMENT_SPEC, required=True),
+        purge=dict(type='bool', required=False, default=False),
+        concurrency=dict(type='int', required=False, default=8),
+    )
+
+    argument_spec = dict(
+        provider=dict(required=True),
+    )
+
+    argument_spec.update(tetration_spec)
+    argument_spec.update(TetrationApiModule.provider_spec)
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+    )
+
+    tet_module = TetrationApiModule(module)
+
+    # These are all elements we put in our return JSON object for clarity
+    result = dict(
+        changed=False,
+        added=[],
+        removed=[],
+    )
+
+    purge = module.params['purge']
+    concurrency = module.params['concurrency']
+
+    # =========================================================================
+    # Get current state of all users and roles with one call per collection
+    index = TetrationUserIndex.from_api(tet_module)
+
+    # =========================================================================
+    # Compute the roles to add and remove for every user
+    operations = []
+    expected_roles = dict()
+    for desired in module.params['assignments']:
+        if not (desired['email'] or desired['user_id']):
+            module.fail_json(msg='One of email or user_id is required for every assignment')
+        user = index.find(email=desired['email'], id=desired['user_id'])
+        label = desired['email'] or desired['user_id']
+        if not user or user.get('disabled_at') is not None:
+            module.fail_json(msg='User %s does not exist or is disabled. Roles cannot be added or '
+                                 'removed from a disabled or nonexistent user.' % label)
+        if user['id'] in expected_roles:
+            module.fail_json(msg='User %s is listed more than once' % label)
+
+        role_ids = set(desired['role_ids'] or [])
+        for role_name in desired['role_names'] or []:
+            role_id = index.resolve_role(role_name, user.get('app_scope_id'))
+            if not role_id:
+                module.fail_json(msg='Unable to find a single role named %s for user: %s' % (role_name, label))
+            role_ids.add(role_id)
+        for role_id in role_ids:
+            if role_id not in index.roles_by_id and desired['state'] == 'present':
+                module.fail_json(msg='Unable to find role with id %s for user: %s' % (role_id, label))
+
+        current = set(user.get('role_ids') or [])
+        if desired['state'] == 'present':
+            to_add = role_ids - current
+            to_remove = current - role_ids if purge else set()
+        else:
+            to_add = set()
+            to_remove = role_ids & current
+        # roles deleted since they were given to the user cannot be removed
+        to_remove = set(role_id for role_id in to_remove if role_id in index.roles_by_id)
+        expected_roles[user['id']] = (current | to_add) - to_remove
+
+        for role_id in sorted(to_add):
+            operations.append(('added', user, dict(
+                method_name = 'put',
+                target = '%s/%s/add_role' % (TETRATION_API_USER, user['id']),
+                req_payload = dict(role_id=role_id)
+            )))
+        for role_id in sorted(to_remove):
+            operations.append(('removed', user, dict(
+                method_name = 'delete',
+                target = '%s/%s/remove_role' % (TETRATION_API_USER, user['id']),
+                req_payload = dict(role_id=role_id)
+            )))
+
+    result['changed'] = bool(operations)
+    if module.check_mode:
+        for action, user, operation in operations:
+            result[action].append(dict(email=user['email'], role_id=operation['req_payload']['role_id']))
+        module.exit_json(**result)
+
+    # =========================================================================
+    # Now apply the changes in parallel, one call at a time for each user
+    failed_operations = []
+    failed_users = set()
+    for batch in operation_rounds(operations, key=lambda operation: operation[1]['id']):
+        batch = [operation for operation in batch if operation[1]['id'] not in failed_users]
+        responses = tet_module.run_method_batch(
+            [operation for (_, _, operation) in batch],
+            concurrency = concurrency
+        )
+        for (action, user, operation), response in zip(batch, responses):
+            role_id = operation['req_payload']['role_id']
+            if response['ok']:
+                result[action].append(dict(email=user['email'], role_id=role_id))
+            else:
+                failed_users.add(user['id'])
+                failed_operations.append(dict(
+                    email = user['email'],
+                    role_id = role_id,
+                    operation = action,
+                    code = response['status_code'],
+                    msg = response['msg']
+                ))
+
+    if failed_operations:
+        module.fail_json(msg='%d of %d role operations failed' % (len(failed_operations), len(operations)),
+                         failed_operations=failed_operations, **result)
+
+    # =========================================================================
+    # Verify the roles of the users changed with a single read of the users
+    if operations:
+        users = tet_module.run_method(
+            method_name = 'get',
+            target = TETRATION_API_USER,
+            params = dict(include_disabled='true')
+        ) or []
+        index = TetrationUserIndex(users)
+        mismatches = []
+        for user_id in set(user['id'] for (_, user, _) in operations):
+            user = index.find(id=user_id) or dict()
+            actual = set(user.get('role_ids') or [])
+            if actual != expected_roles[user_id]:
+                mismatches.append(dict(
+                    email = user.get('email'),
+                    expected = sorted(expected_roles[user_id]),
+                    actual = sorted(actual)
+                ))
+        if mismatches:
+            module.fail_json(msg='%d users do not have the expected roles after the changes' % len(mismatches),
+                             mismatches=mismatches, **result)
+
+    module.exit_json(**result)
+
+if __name__ == '__main__':
+    main()
@@ -27,21 +27,18 @@
 #
 
 import os
-from functools import partial
 from ansible.module_utils._text import to_native
 from ansible.module_utils.six import iteritems, iterkeys
 from ansible.module_utils._text import to_text
+from ansible.module_utils.parsing.convert_bool import boolean
+import hashlib
 import json
-from requests.packages.urllib3 import disable_warnings
-
-try:
-    from tetpyclient import RestClient
-    HAS_TETRATION_CLIENT = True
-except ImportError:
-    HAS_TETRATION_CLIENT = False
+from ansible.module_utils.tetration.cache import TetrationFileCache
+from ansible.module_utils.tetration.json_backend import dumps, response_json
 
 # defining tetration constants
 TETRATION_API_INVENTORY_TAG = '/inventory/tags'
+TETRATION_API_INVENTORY_SEARCH = '/inventory/search'
 TETRATION_API_ROLE = '/roles'
 TETRATION_API_TENANT = '/vrfs'
 TETRATION_API_USER = '/users'
@@ -56,9 +53,6 @@ TETRATION_API_AGENT_CONFIG_PROFILES = '/inventory_config/profiles'
 TETRATION_API_AGENT_CONFIG_INTENTS = '/inventory_config/intents'
 TETRATION_COLUMN_NAMES = '/assets/cmdb/attributenames'
 
-# Disable SSL Warnings
-disable_warnings()
-
 TETRATION_PROVIDER_SPEC = {
     'server_endpoint': dict(type='str',required=True, aliases=['endpoint','host']),
     'api_key': dict(type='str',required=True),
@@ -67,9 +61,16 @@ TETRATION_PROVIDER_SPEC = {
     'silent_ssl_warnings': dict(type='bool', default=True),
     'timeout': dict(type='int', default=10),
     'max_retries': dict(type='int', default=3),
-    'api_version': dict(type='str', default='v1')
+    'api_version': dict(type='str', default='v1'),
+    'worker_socket': dict(type='str', required=False),
+    'compress_requests': dict(type='bool', default=False),
+    'http_cache_dir': dict(type='path', required=False),
+    'http_cache_size': dict(type='int', default=256),
+    'snapshot': dict(type='path', required=False)
 }
 
+_REST_CLIENTS = dict()
+
 
 def get_rest_client(*args, **kwargs):
     ''' Returns an instance of infoblox_client.connector.Connector
@@ -77,12 +78,10 @@ def get_rest_client(*args, **kwargs):
     :params kwargs: dict that is passed to Connector init
     :returns: Connector
     '''
-    if not HAS_TETRATION_CLIENT:
-        raise Exception('tetpyclient is required but does not appear '
-                        'to be installed.  It can be installed using the '
-                        'command `pip install tetpyclient`')
     if not set(kwargs.keys()).issubset(TETRATION_PROVIDER_SPEC.keys()):
         raise ValueError('invalid or unsupported keyword argument for connector')
+    # unset suboptions of the provider parameter arrive as None
+    kwargs = dict((key, value) for (key, value) in iteritems(kwargs) if value is not None)
     for key, value in iteritems(TETRATION_PROVIDER_SPEC):
         if key not in kwargs:
             # apply default values from NIOS_PROVIDER_SPEC since we cannot just
@@ -97,7 +96,38 @@ def get_rest_client(*args, **kwargs):
             # if key is required but still not defined raise Exception
             if key not in kwargs and 'required' in value and value['required']:
                 raise ValueError('option: %s is required' % key)
-    return RestClient(**kwargs)
+    # a process running several tasks, such as the in-process tetration action
+    # plugin going through a loop, keeps one client per provider
+    client_key = json.dumps(kwargs, sort_keys=True)
+    if client_key not in _REST_CLIENTS:
+        _REST_CLIENTS[client_key] = _build_rest_client(kwargs)
+    return _REST_CLIENTS[client_key]
+
+
+def _build_rest_client(kwargs):
+    kwargs = dict(kwargs)
+    compress_requests = boolean(kwargs.pop('compress_requests', False), strict=False)
+    kwargs.pop('http_cache_dir', None)
+    kwargs.pop('http_cache_size', None)
+    kwargs.pop('snapshot', None)
+    # hand the calls over to a running tetration-api-worker if there is one
+    worker_socket = kwargs.pop('worker_socket', None)
+    if worker_socket and os.path.exists(os.path.expanduser(worker_socket)):
+        from ansible.module_utils.tetration.worker import TetrationWorkerClient
+        return TetrationWorkerClient(os.path.expanduser(worker_socket), **kwargs)
+    # tetpyclient and requests take a noticeable time to import, so they are
+    # only loaded once a client is actually needed
+    try:
+        from tetpyclient import RestClient
+    except ImportError:
+        raise Exception('tetpyclient is required but does not appear '
+                        'to be installed.  It can be installed using the '
+                        'command `pip install tetpyclient`')
+    # Disable SSL Warnings
+    from requests.packages.urllib3 import disable_warnings
+    disable_warnings()
+    from ansible.module_utils.tetration.transport import mount_transport_adapter
+    return mount_transport_adapter(RestClient(**kwargs), compress_requests=compress_requests)
 
 class TetrationApiBase(object):
     ''' Base class for implementing Tetration API '''
@@ -116,6 +146,25 @@ class TetrationApiModule(TetrationApiBase):
             super(TetrationApiModule, self).__init__(provider)
         except Exception as exc:
             self.module.fail_json(msg=to_text(exc))
+        # with a snapshot exported by tetration_snapshot_export, reads are
+        # answered from the snapshot; in check mode nothing reaches the cluster,
+        # otherwise writes first check that their object did not change
+        snapshot = provider.get('snapshot') or os.environ.get('TETRATION_SNAPSHOT')
+        if snapshot:
+            from ansible.module_utils.tetration.snapshot import TetrationSnapshotClient
+            try:
+                self.rc = TetrationSnapshotClient(snapshot, live=None if module.check_mode else self.rc)
+            except Exception as exc:
+                self.module.fail_json(msg='Unable to open snapshot %s: %s' % (snapshot, to_text(exc)))
+        # responses of get are revalidated instead of downloaded again when a
+        # cache directory is set, per cluster and API key
+        cache_dir = provider.get('http_cache_dir') or os.environ.get('TETRATION_HTTP_CACHE_DIR')
+        cache_size = provider.get('http_cache_size') or os.environ.get('TETRATION_HTTP_CACHE_SIZE') or 256
+        self.cache = None
+        if cache_dir and not snapshot:
+            self.cache = TetrationFileCache(cache_dir, namespace='%s %s' % (
+                getattr(self.rc, 'server_endpoint', ''), getattr(self.rc, 'api_key', '')),
+                max_size=int(cache_size) * 1024 * 1024)
 
     def handle_exception(self, method_name, exc):
         ''' Handles any exceptions raised
@@ -141,7 +190,7 @@ class TetrationApiModule(TetrationApiBase):
             search_objects = query_result[sub_element] if sub_element and sub_element in query_result else query_result
             for obj in search_objects:
                 match = True
-                for k, v in filter.iteritems():
+                for k, v in iteritems(filter):
                     if obj[k] != v:
                         match = False
                 if match:
@@ -162,41 +211,176 @@ class TetrationApiModule(TetrationApiBase):
             'delete': self.delete
         }
         return methods[method_name](target,params,req_payload)
-    
+
+    def run_method_batch(self, operations, concurrency=8, max_failures=None):
+        ''' Executes many run_method style operations concurrently
+        Each operation is a dict with the keys method_name and target, and
+        optionally params and req_payload. A failed operation does not fail
+        the module; instead one result dict per operation is returned in input
+        order, each containing ok, status_code and either json or msg.
+        When max_failures is set, operations not started yet once more than
+        max_failures operations failed are not sent, and their result has
+        skipped set. Operations already sent still complete.
+        '''
+        failures = []
+
+        def execute(operation):
+            if max_failures is not None and len(failures) > max_failures:
+                return dict(ok=False, skipped=True, status_code=None,
+                            msg='not sent, more than %d operations failed' % max_failures)
+            result = send(operation)
+            if not result['ok']:
+                failures.append(operation)
+            return result
+
+        def send(operation):
+            method_name = operation['method_name']
+            try:
+                if method_name == 'get' and self.cache is not None:
+                    status_code, document, resp = self.get_revalidated(operation['target'], operation.get('params'))
+                    if status_code == 200:
+                        return dict(ok=True, status_code=status_code, json=document)
+                elif method_name == 'get':
+                    resp = self.rc.get(operation['target'], params=operation.get('params'))
+                else:
+                    resp = getattr(self.rc, method_name)(
+                        operation['target'],
+                        json_body=dumps(operation.get('req_payload'))
+                    )
+            except Exception as exc:
+                return dict(ok=False, status_code=None, msg=to_text(exc))
+            result = dict(ok=resp.status_code // 100 == 2, status_code=resp.status_code)
+            if result['ok']:
+                try:
+                    result['json'] = response_json(resp)
+                except ValueError:
+                    result['json'] = None
+            else:
+                result['msg'] = resp.text
+            return result
+
+        if not operations:
+            return []
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(max(1, min(concurrency, len(operations))))
+        try:
+            return pool.map(execute, operations)
+        finally:
+            pool.close()
+            pool.join()
+
+    def run_method_batch_paginated(self, operations, concurrency=8):
+        ''' Executes get operations like run_method_batch, following the offset
+        returned by paged collections, such as /sensors, until the last page as
+        tetration_rest does with paginate. The records of all pages are returned
+        in json.results, and the pages of different operations are retrieved
+        concurrently.
+        '''
+        results = [None] * len(operations)
+        pending = [(idx, operation) for idx, operation in enumerate(operations)]
+        while pending:
+            responses = self.run_method_batch([operation for (_, operation) in pending], concurrency=concurrency)
+            next_pending = []
+            for (idx, operation), response in zip(pending, responses):
+                page = response.get('json')
+                paged = response['ok'] and isinstance(page, dict) and 'offset' in page
+                if results[idx] is None or not response['ok']:
+                    results[idx] = response
+                    if paged:
+                        response['json'] = dict(results=list(page.get('results') or []))
+                elif isinstance(page, dict):
+                    # the last page has no offset
+                    results[idx]['json']['results'].extend(page.get('results') or [])
+                if paged and page.get('offset') and page.get('results'):
+                    params = dict(operation.get('params') or dict(), offset=page['offset'])
+                    next_pending.append((idx, dict(operation, params=params)))
+            pending = next_pending
+        return results
+
     def get(self, target, params, req_payload):
+        if self.cache is not None:
+            return self.get_cached(target, params)
         resp = self.rc.get(target, params=params)
         # import pdb; pdb.set_trace()
         if resp.status_code == 400:
             return None
         elif resp.status_code == 200:
-            return resp.json()
+            return response_json(resp)
         else:
             self.handle_exception('get', resp)
 
+    def get_cached(self, target, params):
+        ''' Get revalidating the cached response with a conditional request
+        '''
+        status_code, document, resp = self.get_revalidated(target, params)
+        if status_code == 400:
+            return None
+        elif status_code // 100 != 2:
+            self.handle_exception('get', resp)
+        return document
+
+    def get_revalidated(self, target, params):
+        ''' Returns the status code, the document and the response of a get
+        revalidating the cached response with a conditional request. The cached
+        document is reused with status code 200 when the server answers 304 Not
+        Modified, or when it gives no validator and the body has the same hash.
+        Only responses with status code 200 are cached.
+        '''
+        key = ('get', target, json.dumps(params, sort_keys=True))
+        entry = self.cache.get(*key)
+        headers = dict()
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        extra_headers = getattr(self.rc, 'extra_headers', None)
+        if extra_headers is not None:
+            extra_headers.headers = headers
+        try:
+            resp = self.rc.get(target, params=params)
+        finally:
+            if extra_headers is not None:
+                extra_headers.headers = None
+        if resp.status_code == 304 and entry:
+            return 200, entry['document'], resp
+        if resp.status_code != 200:
+            return resp.status_code, None, resp
+        digest = hashlib.sha1(resp.content).hexdigest()
+        if entry and entry.get('sha1') == digest:
+            return 200, entry['document'], resp
+        document = response_json(resp)
+        self.cache.set(dict(
+            etag=resp.headers.get('ETag'),
+            last_modified=resp.headers.get('Last-Modified'),
+            sha1=digest,
+            document=document
+        ), *key)
+        return 200, document, resp
+
     def post(self, target, params, req_payload):
-        resp = self.rc.post(target, json_body=json.dumps(req_payload))
-        if resp.status_code/100 == 2:
+        resp = self.rc.post(target, json_body=dumps(req_payload))
+        if resp.status_code // 100 == 2:
             try:
-                return resp.json()
+                return response_json(resp)
             except ValueError:
                 return None
         else:
             self.handle_exception('post', resp)
     def put(self, target, params, req_payload):
-        resp = self.rc.put(target, json_body=json.dumps(req_payload))
-        if resp.status_code/100 == 2:
+        resp = self.rc.put(target, json_body=dumps(req_payload))
+        if resp.status_code // 100 == 2:
             try:
-                return resp.json()
+                return response_json(resp)
             except ValueError:
                 return None
         else:
             self.handle_exception('put', resp)
 
     def delete(self, target, params, req_payload):
-        resp = self.rc.delete(target, json_body=json.dumps(req_payload))
-        if resp.status_code/100 == 2:
+        resp = self.rc.delete(target, json_body=dumps(req_payload))
+        if resp.status_code // 100 == 2:
             try:
-                return resp.json()
+                return response_json(resp)
             except ValueError:
                 return None
         else:
@@ -208,7 +392,7 @@ class TetrationApiModule(TetrationApiBase):
             for k in list(iterkeys(obj1)):
                 if k in list(iterkeys(obj2)):
                     if type(obj1[k]) is dict:
-                        if cmp(obj1[k],obj2[k]) != 0:
+                        if obj1[k] != obj2[k]:
                             changed_flag = True
                     elif obj1[k] != obj2[k]:
                         changed_flag = True
@@ -232,146 +416,3 @@ class TetrationApiModule(TetrationApiBase):
     def clear_values(self, obj):
         for k in list(iterkeys(obj)):
             obj[k] = ''
-
-TETRATION_API_PROTOCOLS = [
-dict(name='ANY',value=""),
-dict(name='TCP',value=6),
-dict(name='UDP',value=17),
-dict(name='ICMP',value=1),
-dict(name='Other',value=0),
-dict(name='A/N',value=107),
-dict(name='AH',value=51),
-dict(name='ARGUS',value=13),
-dict(name='ARIS',value=104),
-dict(name='AX.25',value=93),
-dict(name='BBN-RCC-MON',value=10),
-dict(name='BNA',value=49),
-dict(name='BR-SAT-MON',value=76),
-dict(name='CARP',value=112),
-dict(name='CBT',value=7),
-dict(name='CFTP',value=62),
-dict(name='CHAOS',value=16),
-dict(name='CPHB',value=73),
-dict(name='CPNX',value=72),
-dict(name='CRTP',value=126),
-dict(name='CRUDP',value=127),
-dict(name='Compaq-Peer',value=110),
-dict(name='DCCP',value=33),
-dict(name='DCN-MEAS',value=19),
-dict(name='DDP',value=37),
-dict(name='DDX',value=116),
-dict(name='DGP',value=86),
-dict(name='DIVERT',value=258),
-dict(name='DSR',value=48),
-dict(name='EGP',value=8),
-dict(name='EIGRP',value=88),
-dict(name='EMCON',value=14),
-dict(name='ENCAP',value=98),
-dict(name='ESP',value=50),
-dict(name='ETHERIP',value=97),
-dict(name='FC',value=133),
-dict(name='FIRE',value=125),
-dict(name='GGP',value=3),
-dict(name='GMTP',value=100),
-dict(name='GRE',value=47),
-dict(name='HIP',value=139),
-dict(name='HMP',value=20),
-dict(name='I-NLSP',value=52),
-dict(name='IATP',value=117),
-dict(name='IDPR',value=35),
-dict(name='IDPR-CMTP',value=38),
-dict(name='IDRP',value=45),
-dict(name='IFMP',value=101),
-dict(name='IGMP',value=2),
-dict(name='IGP',value=9),
-dict(name='IL',value=40),
-dict(name='IP-ENCAP',value=4),
-dict(name='IPCV',value=71),
-dict(name='IPComp',value=108),
-dict(name='IPIP',value=94),
-dict(name='IPLT',value=129),
-dict(name='IPPC',value=67),
-dict(name='IPV6',value=41),
-dict(name='IPV6-FRAG',value=44),
-dict(name='IPV6-ICMP',value=58),
-dict(name='IPV6-NONXT',value=59),
-dict(name='IPV6-OPTS',value=60),
-dict(name='IPV6-ROUTE',value=43),
-dict(name='IPX-in-IP',value=111),
-dict(name='IRTP',value=28),
-dict(name='ISIS',value=124),
-dict(name='ISO-IP',value=80),
-dict(name='ISO-TP4',value=29),
-dict(name='KRYPTOLAN',value=65),
-dict(name='L2TP',value=115),
-dict(name='LARP',value=91),
-dict(name='LEAF-1',value=25),
-dict(name='LEAF-2',value=26),
-dict(name='MANET',value=138),
-dict(name='MERIT-INP',value=32),
-dict(name='MFE-NSP',value=31),
-dict(name='MICP',value=95),
-dict(name='MOBILE',value=55),
-dict(name='MPLS-IN-IP',value=137),
-dict(name='MTP',value=92),
-dict(name='MUX',value=18),
-dict(name='Mobility-Header',value=135),
-dict(name='NARP',value=54),
-dict(name='NETBLT',value=30),
-dict(name='NSFNET-IGP',value=85),
-dict(name='NVP-II',value=11),
-dict(name='OSPFIGP',value=89),
-dict(name='PFSYNC',value=240),
-dict(name='PGM',value=113),
-dict(name='PIM',value=103),
-dict(name='PIPE',value=131),
-dict(name='PNNI',value=102),
-dict(name='PRM',value=21),
-dict(name='PTP',value=123),
-dict(name='PUP',value=12),
-dict(name='PVP',value=75),
-dict(name='QNX',value=106),
-dict(name='RDP',value=27),
-dict(name='ROHC',value=142),
-dict(name='RSVP',value=46),
-dict(name='RSVP-E2E-IGNORE',value=134),
-dict(name='RVD',value=66),
-dict(name='SAT-EXPAK',value=64),
-dict(name='SAT-MON',value=69),
-dict(name='SCC-SP',value=96),
-dict(name='SCPS',value=105),
-dict(name='SCTP',value=132),
-dict(name='SDRP',value=42),
-dict(name='SECURE-VMTP',value=82),
-dict(name='SHIM6',value=140),
-dict(name='SKIP',value=57),
-dict(name='SM',value=122),
-dict(name='SMP',value=121),
-dict(name='SNP',value=109),
-dict(name='SPS',value=130),
-dict(name='SRP',value=119),
-dict(name='SSCOPMCE',value=128),
-dict(name='ST2',value=5),
-dict(name='STP',value=118),
-dict(name='SUN-ND',value=77),
-dict(name='SWIPE',value=53),
-dict(name='Sprite-RPC',value=90),
-dict(name='TCF',value=87),
-dict(name='TLSP',value=56),
-dict(name='TP++',value=39),
-dict(name='TRUNK-1',value=23),
-dict(name='TRUNK-2',value=24),
-dict(name='TTP',value=84),
-dict(name='UDPLite',value=136),
-dict(name='UTI',value=120),
-dict(name='VINES',value=83),
-dict(name='VISA',value=70),
-dict(name='VMTP',value=81),
-dict(name='WB-EXPAK',value=79),
-dict(name='WB-MON',value=78),
-dict(name='WESP',value=141),
-dict(name='WSN',value=74),
-dict(name='XNET',value=15),
-dict(name='XNS-IDP',value=22),
-dict(name='XTP',value=36),
-]
\ No newline at end of file
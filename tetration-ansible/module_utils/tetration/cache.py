@@ -0,0 +1,129 @@
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+import errno
+import hashlib
+import json
+import os
+import tempfile
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.module_utils.tetration.json_backend import dumps, loads
+
+
+def document_hash(document):
+    ''' Returns a hash of the content of a document, to be used as a key part
+    validating entries against a document that can change without a version
+    '''
+    return hashlib.sha1(to_bytes(json.dumps(document, sort_keys=True, separators=(',', ':')))).hexdigest()
+
+
+class TetrationFileCache(object):
+    ''' Content addressed store of API documents on the local disk
+    Documents are stored under the hash of their key, which must identify an
+    immutable document such as an application version. Entries are never
+    invalidated, so callers are responsible for choosing keys that change
+    whenever the document does.
+    When max_size is set, the least recently used entries are removed after
+    the first write of the instance so the cache stays below max_size bytes.
+    '''
+    def __init__(self, path, namespace='', max_size=None):
+        self.path = os.path.expanduser(path)
+        self.namespace = to_text(namespace)
+        self.max_size = max_size
+        self._pruned = False
+
+    def key(self, *parts):
+        ''' Returns the hash identifying the document for the key parts
+        '''
+        key = json.dumps([self.namespace] + [to_text(part) for part in parts], separators=(',', ':'))
+        return hashlib.sha1(to_bytes(key)).hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, key[:2], '%s.json' % key)
+
+    def get(self, *parts):
+        ''' Returns the cached document or None if it is not in the cache
+        '''
+        path = self._file(self.key(*parts))
+        try:
+            with open(path, 'rb') as f:
+                document = loads(f.read())
+        except (IOError, OSError, ValueError):
+            return None
+        if self.max_size:
+            # the modification time orders entries by last use when pruning
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass
+        return document
+
+    def set(self, document, *parts):
+        ''' Stores the document atomically so concurrent tasks never read a
+        partially written entry
+        '''
+        target = self._file(self.key(*parts))
+        try:
+            os.makedirs(os.path.dirname(target))
+        except OSError as exc:
+            if exc.errno != errno.EEXIST:
+                raise
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(to_bytes(dumps(document)))
+            os.rename(tmp, target)
+        except Exception:
+            os.remove(tmp)
+            raise
+        if self.max_size and not self._pruned:
+            self._pruned = True
+            self.prune(self.max_size)
+
+    def prune(self, max_size):
+        ''' Removes the least recently used entries, of every namespace, until
+        the entries take at most max_size bytes
+        '''
+        entries = []
+        for dirpath, _, filenames in os.walk(self.path):
+            for filename in filenames:
+                if not filename.endswith('.json'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for (_, size, _) in entries)
+        for _, size, path in sorted(entries):
+            if total <= max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
@@ -0,0 +1,135 @@
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+# Drift between two tenant snapshots written by tetration_snapshot_export.
+# Snapshots are trees of scopes and applications whose nodes carry the hash
+# of everything below them, so the comparison walks down from the roots and
+# stops at the first node with the same hash in both snapshots: the work
+# done depends on the amount of change rather than on the size of the tenant.
+
+
+def _changed_fields(base, target):
+    if not (isinstance(base, dict) and isinstance(target, dict)):
+        return []
+    return sorted(key for key in set(base) | set(target) if base.get(key) != target.get(key))
+
+
+class TetrationSnapshotDrift(object):
+    ''' Differences between a base and a target TetrationSnapshot
+    After compare(), added, removed and modified hold one dict per object with
+    its kind, id and name, and modified objects also list the fields that
+    differ. Objects moved to another scope are reported as modified.
+    '''
+    def __init__(self, base, target):
+        self.base = base
+        self.target = target
+        self.added = []
+        self.removed = []
+        self.modified = []
+        self.nodes_compared = 0
+        self.nodes_skipped = 0
+
+    def compare(self, kinds=None):
+        added = dict()
+        removed = dict()
+        # a node moved to another parent is listed under both parents, it is
+        # only compared once
+        stack = []
+        visited = set()
+
+        def push(node):
+            for snapshot in (self.base, self.target):
+                for child in snapshot.node_children(node):
+                    if child not in visited:
+                        visited.add(child)
+                        stack.append(child)
+
+        push(None)
+        while stack:
+            node = stack.pop()
+            base_hash = self.base.node_hash(node)
+            target_hash = self.target.node_hash(node)
+            if base_hash == target_hash:
+                # identical subtree, nothing below needs to be read
+                self.nodes_skipped += 1
+                continue
+            self.nodes_compared += 1
+            base_entries = self.base.node_entries(node) if base_hash else dict()
+            target_entries = self.target.node_entries(node) if target_hash else dict()
+            for key, digest in target_entries.items():
+                if base_entries.get(key) != digest:
+                    added[key] = (digest, node)
+            for key, digest in base_entries.items():
+                if target_entries.get(key) != digest:
+                    removed[key] = (digest, node)
+            push(node)
+
+        for key in sorted(set(added) | set(removed)):
+            kind, id = key
+            if kinds and kind not in kinds:
+                continue
+            base_document = self._document(self.base, kind, id) if key in removed else None
+            target_document = self._document(self.target, kind, id) if key in added else None
+            if key in added and key in removed:
+                if added[key][0] == removed[key][0]:
+                    # same object attached to another node only
+                    continue
+                entry = self._entry(kind, id, target_document, added[key][1])
+                entry['fields'] = _changed_fields(base_document, target_document)
+                self.modified.append(entry)
+            elif key in added:
+                self.added.append(self._entry(kind, id, target_document, added[key][1]))
+            else:
+                self.removed.append(self._entry(kind, id, base_document, removed[key][1]))
+        return self
+
+    @staticmethod
+    def _document(snapshot, kind, id):
+        if kind == 'policies':
+            return snapshot.policy(id)
+        return snapshot.get(kind, id)
+
+    @staticmethod
+    def _entry(kind, id, document, node):
+        entry = dict(kind=kind, id=id)
+        if kind == 'policies':
+            entry['application_id'] = node.split(':', 1)[1]
+        if isinstance(document, dict):
+            entry['name'] = document.get('name') or document.get('email')
+            for key in ('app_scope_id', 'consumer_filter_id', 'provider_filter_id'):
+                if document.get(key):
+                    entry[key] = document[key]
+        return entry
+
+    def summary(self):
+        ''' Returns the number of objects added, removed and modified per kind
+        '''
+        summary = dict()
+        for change in ('added', 'removed', 'modified'):
+            for entry in getattr(self, change):
+                summary.setdefault(entry['kind'], dict(added=0, removed=0, modified=0))[change] += 1
+        return summary
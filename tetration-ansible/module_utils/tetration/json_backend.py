@@ -0,0 +1,282 @@
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+# JSON encoding and decoding of API documents. The fastest library installed
+# among orjson, ujson and simplejson is used, falling back to the standard
+# library. TETRATION_JSON_BACKEND forces a backend by name.
+#
+# Hashes and cache keys keep using the standard library json module with
+# explicit separators, so that they do not change with the installed backend.
+
+import json
+import os
+import re
+
+from ansible.module_utils._text import to_text
+
+
+def _orjson():
+    import orjson
+    return (
+        lambda obj: orjson.dumps(obj).decode('utf-8'),
+        orjson.loads
+    )
+
+
+def _ujson():
+    import ujson
+    return (
+        lambda obj: ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False),
+        ujson.loads
+    )
+
+
+def _simplejson():
+    import simplejson
+    return (
+        simplejson.dumps,
+        simplejson.loads
+    )
+
+
+def _stdlib():
+    def loads(data):
+        return json.loads(to_text(data, errors='surrogate_or_strict'))
+    return (
+        json.dumps,
+        loads
+    )
+
+
+JSON_BACKENDS = (
+    ('orjson', _orjson),
+    ('ujson', _ujson),
+    ('simplejson', _simplejson),
+    ('json', _stdlib),
+)
+
+
+def load_backend(name=None):
+    ''' Returns a tuple of the name, dumps and loads functions of the backend
+    called name, or of the first backend that can be imported
+    '''
+    for backend_name, backend in JSON_BACKENDS:
+        if name and backend_name != name:
+            continue
+        try:
+            return (backend_name,) + backend()
+        except ImportError:
+            if name:
+                raise
+    raise ValueError('unknown JSON backend: %s' % name)
+
+
+JSON_BACKEND, dumps, loads = load_backend(os.environ.get('TETRATION_JSON_BACKEND'))
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_SCALAR = re.compile(r'[^ \t\n\r,:\]}]*')
+_STRING_STOP = re.compile(r'["\\]')
+_STRUCTURE_STOP = re.compile(r'["\[\]{}]')
+
+
+def response_json(resp):
+    ''' Decodes the body of an API response
+    '''
+    return loads(resp.content)
+
+
+class _JSONStream(object):
+    ''' Reads the values of a JSON document from a file chunk by chunk
+    The end of a value is found by scanning each character once, keeping the
+    nesting depth and string state between reads, and only the text of the
+    value is then decoded. Skipped values are neither decoded nor kept.
+    '''
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = u''
+        self.pos = 0
+        self.eof = False
+
+    def _read(self):
+        chunk = self.f.read(self.chunk_size)
+        self.eof = not chunk
+        self.buf = self.buf[self.pos:] + to_text(chunk)
+        self.pos = 0
+
+    def peek(self):
+        ''' Returns the next character that is not a whitespace, or an empty
+        string at the end of the file
+        '''
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self._read()
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError('invalid JSON document')
+        self.pos += 1
+        return char
+
+    def _scan(self, keep):
+        ''' Moves past the next value and returns its text, or None unless
+        keep is set
+        '''
+        first = self.peek()
+        if not first:
+            raise ValueError('invalid JSON document')
+        scalar = first not in u'[{"'
+        in_string = first == u'"'
+        escaped = False
+        depth = 0
+        parts = []
+        start = self.pos
+        i = start + 1 if in_string else start
+        end = None
+        while True:
+            size = len(self.buf)
+            while end is None and i < size:
+                if escaped:
+                    escaped = False
+                    i += 1
+                elif in_string:
+                    match = _STRING_STOP.search(self.buf, i)
+                    if not match:
+                        i = size
+                    elif match.group() == u'\\':
+                        escaped = True
+                        i = match.end()
+                    else:
+                        in_string = False
+                        i = match.end()
+                        if depth == 0:
+                            end = i
+                elif scalar:
+                    i = _SCALAR.match(self.buf, i).end()
+                    if i < size:
+                        end = i
+                else:
+                    match = _STRUCTURE_STOP.search(self.buf, i)
+                    if not match:
+                        i = size
+                        continue
+                    char = match.group()
+                    i = match.end()
+                    if char == u'"':
+                        in_string = True
+                    elif char in u'[{':
+                        depth += 1
+                    else:
+                        depth -= 1
+                        if depth == 0:
+                            end = i
+            if end is None and self.eof and scalar and i > start:
+                end = i
+            if end is not None:
+                break
+            if self.eof:
+                raise ValueError('invalid JSON document')
+            # the text scanned so far is dropped from the buffer, and kept
+            # aside only when the value is decoded
+            if keep:
+                parts.append(self.buf[start:i])
+            self.pos = i
+            self._read()
+            start = i = 0
+        self.pos = end
+        if not keep:
+            return None
+        parts.append(self.buf[start:end])
+        return u''.join(parts)
+
+    def value(self):
+        # a value already read whole, followed by a separator, is decoded in
+        # place; any other is scanned first so its text is decoded only once
+        self.peek()
+        try:
+            item, end = self.decoder.raw_decode(self.buf, self.pos)
+        except ValueError:
+            end = None
+        if end is not None:
+            following = _WHITESPACE.match(self.buf, end).end()
+            if self.buf[following:following + 1] in (',', ']', '}', ':') or (self.eof and following == len(self.buf)):
+                self.pos = end
+                return item
+        return self.decoder.decode(self._scan(keep=True))
+
+    def skip(self):
+        self._scan(keep=False)
+
+    def items(self):
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+
+def iter_array(f, chunk_size=65536, key=None):
+    ''' Yields the items of the JSON array stored in a file one at a time, so
+    that files larger than the memory available can be processed
+    When key is set and the file holds an object, such as a page of results,
+    the items of its array member named key are yielded instead. The other
+    members are skipped without being decoded, and ValueError is raised when
+    there is no such member.
+    '''
+    stream = _JSONStream(f, chunk_size)
+    char = stream.peek()
+    if char == '[':
+        for item in stream.items():
+            yield item
+        return
+    if char != '{' or key is None:
+        raise ValueError('expected a JSON array')
+    stream.expect('{')
+    found = False
+    if stream.peek() == '}':
+        stream.pos += 1
+    else:
+        while True:
+            name = stream.value()
+            stream.expect(':')
+            if name == key and stream.peek() == '[':
+                found = True
+                for item in stream.items():
+                    yield item
+            else:
+                stream.skip()
+            if stream.expect(',}') == '}':
+                break
+    if not found:
+        raise ValueError('no %s array in the JSON object' % key)
@@ -0,0 +1,236 @@
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+import hashlib
+import json
+from ansible.module_utils._text import to_bytes
+from ansible.module_utils.tetration.api import TETRATION_API_APPLICATIONS
+from ansible.module_utils.tetration.api import TETRATION_API_INVENTORY_FILTER
+from ansible.module_utils.tetration.api import TETRATION_API_SCOPES
+
+# sections of the /applications/{id}/policies document and their rank
+TETRATION_POLICY_SECTIONS = (
+    ('absolute_policies', 'ABSOLUTE'),
+    ('default_policies', 'DEFAULT'),
+)
+
+
+def _filter_name(policy, role):
+    ''' Returns the name of the consumer or provider filter of a policy,
+    falling back to its id. Cluster ids change between versions of an
+    application while their names do not.
+    '''
+    policy_filter = policy.get('%s_filter' % role)
+    if policy_filter and policy_filter.get('name'):
+        return policy_filter['name']
+    return policy.get('%s_filter_id' % role)
+
+
+def canonical_l4_params(l4_params):
+    ''' Returns the l4_params of a policy as a sorted tuple of
+    (proto, port_start, port_end) tuples
+    '''
+    params = set()
+    for param in l4_params or []:
+        port = param.get('port') or [None, None]
+        params.add((param.get('proto'), port[0], port[-1]))
+    return tuple(sorted(params, key=lambda p: tuple((v is None, v or 0) for v in p)))
+
+
+def policy_identity(policy, rank=None):
+    ''' Returns the tuple identifying a policy across application versions
+    '''
+    return (rank or policy.get('rank'), _filter_name(policy, 'consumer'), _filter_name(policy, 'provider'))
+
+
+def canonical_policy(policy, rank=None):
+    ''' Returns the canonical tuple of a policy, made of its identity, action,
+    priority and l4_params
+    '''
+    return policy_identity(policy, rank) + (policy.get('action'), policy.get('priority'), canonical_l4_params(policy.get('l4_params')))
+
+
+def policy_hash(policy, rank=None):
+    ''' Returns a stable hash of the canonical tuple of a policy
+    '''
+    return hashlib.sha1(to_bytes(json.dumps(canonical_policy(policy, rank), separators=(',', ':')))).hexdigest()
+
+
+def _summary(canonical):
+    rank, consumer, provider, action, priority, l4_params = canonical
+    return dict(
+        rank=rank,
+        consumer=consumer,
+        provider=provider,
+        action=action,
+        priority=priority,
+        l4_params=[dict(proto=p[0], port=[p[1], p[2]]) for p in l4_params]
+    )
+
+
+def diff_policies(base_policies, target_policies, rank=None):
+    ''' Returns the policies added, removed and changed between two lists of
+    policies. Policies are matched by identity and compared by hash, so
+    unchanged policies cost one dictionary lookup each.
+    '''
+    base = dict()
+    for policy in base_policies or []:
+        canonical = canonical_policy(policy, rank)
+        base.setdefault(canonical[:3], dict())[policy_hash(policy, rank)] = canonical
+    target = dict()
+    for policy in target_policies or []:
+        canonical = canonical_policy(policy, rank)
+        target.setdefault(canonical[:3], dict())[policy_hash(policy, rank)] = canonical
+
+    diff = dict(added=[], removed=[], changed=[], unchanged=0)
+    for identity, target_versions in target.items():
+        base_versions = base.get(identity, dict())
+        removed = [base_versions[h] for h in base_versions if h not in target_versions]
+        added = [target_versions[h] for h in target_versions if h not in base_versions]
+        diff['unchanged'] += len(target_versions) - len(added)
+        # a single policy on both sides that differs is reported as a change
+        if len(removed) == 1 and len(added) == 1:
+            old, new = removed[0], added[0]
+            change = _summary(new)
+            change['base'] = dict(action=old[3], priority=old[4])
+            change['l4_params_added'] = [dict(proto=p[0], port=[p[1], p[2]]) for p in new[5] if p not in old[5]]
+            change['l4_params_removed'] = [dict(proto=p[0], port=[p[1], p[2]]) for p in old[5] if p not in new[5]]
+            diff['changed'].append(change)
+            continue
+        diff['removed'].extend(_summary(c) for c in removed)
+        diff['added'].extend(_summary(c) for c in added)
+    for identity, base_versions in base.items():
+        if identity not in target:
+            diff['removed'].extend(_summary(c) for c in base_versions.values())
+    return diff
+
+
+class TetrationFilterNameIndex(object):
+    ''' Resolves the names usable as policy consumer or provider to their ids
+    Names are looked up in the application clusters first, then in the
+    inventory filters and finally in the scopes of the root scope, matching the
+    order in which M(tetration_application_policy) searches them. The index is
+    built once and can be reused for any number of lookups.
+    '''
+    def __init__(self, clusters=None, inventory_filters=None, app_scopes=None):
+        self.ids = dict()
+        for items in (clusters, inventory_filters, app_scopes):
+            for item in items or []:
+                self.ids.setdefault(item['name'], item['id'])
+
+    def resolve(self, name):
+        ''' Returns the id for the name or None if it is unknown
+        '''
+        return self.ids.get(name)
+
+    @classmethod
+    def from_api(cls, tet_module, app_id, root_app_scope_id):
+        ''' Builds the index for an application, retrieving its clusters, the
+        scopes and the inventory filters in parallel
+        '''
+        responses = tet_module.run_method_batch([
+            dict(method_name='get', target='%s/%s/clusters' % (TETRATION_API_APPLICATIONS, app_id)),
+            dict(method_name='get', target=TETRATION_API_SCOPES),
+            dict(method_name='get', target=TETRATION_API_INVENTORY_FILTER),
+        ], concurrency=3)
+        for response in responses:
+            if not response['ok']:
+                tet_module.module.fail_json(msg=response['msg'], code=response['status_code'], operation='get')
+        clusters, app_scopes, inventory_filters = [response['json'] or [] for response in responses]
+        app_scopes = [scope for scope in app_scopes if scope['root_app_scope_id'] == root_app_scope_id]
+        scope_ids = set(scope['id'] for scope in app_scopes)
+        inventory_filters = [item for item in inventory_filters if item['app_scope_id'] in scope_ids]
+        return cls(clusters, inventory_filters, app_scopes)
+
+
+# policy indexes built by this process, kept across the runs of the in-process
+# tetration action plugin, such as the items of a loop
+_POLICY_INDEXES = dict()
+
+
+class TetrationPolicyIndex(object):
+    ''' Index of the absolute or default policies of an application
+    Policies are keyed on (version, rank, consumer, provider) where consumer and
+    provider may each be given by filter id or by filter name, so finding the
+    existing policy is a dictionary lookup instead of a scan. Indexes built with
+    from_api are kept for the process and reused by every module run against
+    the same version of the application, until invalidate() drops them after
+    a write.
+    '''
+    def __init__(self, policies, rank=None):
+        self.policies = dict()
+        for policy in policies or []:
+            policy_rank = rank or policy.get('rank')
+            for consumer in self._filter_keys(policy, 'consumer'):
+                for provider in self._filter_keys(policy, 'provider'):
+                    self.policies.setdefault((policy.get('version'), policy_rank, consumer, provider), policy)
+
+    @staticmethod
+    def _filter_keys(policy, role):
+        keys = [('id', policy.get('%s_filter_id' % role))]
+        policy_filter = policy.get('%s_filter' % role)
+        if policy_filter and policy_filter.get('name'):
+            keys.append(('name', policy_filter['name']))
+        return keys
+
+    def find(self, version, rank, consumer_filter_id=None, consumer_filter_name=None,
+             provider_filter_id=None, provider_filter_name=None):
+        ''' Returns the policy matching the version, rank, consumer and provider
+        or None. Ids take precedence over names when both are given.
+        '''
+        consumer = ('id', consumer_filter_id) if consumer_filter_id else ('name', consumer_filter_name) if consumer_filter_name else None
+        provider = ('id', provider_filter_id) if provider_filter_id else ('name', provider_filter_name) if provider_filter_name else None
+        if not (consumer and provider):
+            return None
+        return self.policies.get((version, rank, consumer, provider))
+
+    @staticmethod
+    def _client_key(tet_module):
+        rc = tet_module.rc
+        return (type(rc).__name__, getattr(rc, 'server_endpoint', None), getattr(rc, 'api_key', None))
+
+    @classmethod
+    def from_api(cls, tet_module, app_id, version, rank, refresh=False):
+        ''' Returns the index of the ABSOLUTE or DEFAULT policies of a version
+        of an application, retrieving them only if they were not indexed yet
+        by this process or if refresh is set
+        '''
+        key = cls._client_key(tet_module) + (app_id, version, rank)
+        if refresh or key not in _POLICY_INDEXES:
+            policies = tet_module.run_method(
+                method_name = 'get',
+                target = '%s/%s/%s' % (TETRATION_API_APPLICATIONS, app_id, 'absolute_policies' if rank == 'ABSOLUTE' else 'default_policies'),
+            )
+            _POLICY_INDEXES[key] = cls(policies, rank)
+        return _POLICY_INDEXES[key]
+
+    @classmethod
+    def invalidate(cls, tet_module, app_id):
+        ''' Drops the indexes of an application after its policies changed
+        '''
+        client_key = cls._client_key(tet_module)
+        for key in [key for key in _POLICY_INDEXES if key[:3] == client_key and key[3] == app_id]:
+            del _POLICY_INDEXES[key]
@@ -0,0 +1,123 @@
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+import hashlib
+import json
+from ansible.module_utils.six import iteritems, string_types
+from ansible.module_utils._text import to_bytes, to_text
+
+try:
+    import ipaddress
+except ImportError:
+    from ansible.module_utils.compat import ipaddress
+
+# boolean operators whose operands can be reordered and flattened
+TETRATION_QUERY_COMMUTATIVE_TYPES = ('and', 'or')
+
+# fields holding an address or a subnet
+TETRATION_QUERY_ADDRESS_FIELDS = ('ip', 'ipv6', 'address')
+
+
+def _normalize_address(query_type, value):
+    ''' Returns the address or subnet in value written in its canonical form
+    so that 10.1.1.7/24 and 10.1.1.0/24 compare equal. Values that are not
+    valid addresses are returned unchanged.
+    '''
+    if not isinstance(value, string_types):
+        return value
+    try:
+        if query_type == 'subnet' or '/' in value:
+            return to_text(ipaddress.ip_network(to_text(value.strip()), strict=False))
+        return to_text(ipaddress.ip_address(to_text(value.strip())))
+    except ValueError:
+        return value
+
+
+def _canonicalize(query):
+    ''' Returns a tuple of the canonical form of query and its serialized
+    representation. The serialized form is computed once per node and is used
+    as the sort key of the operands of its parent.
+    '''
+    if isinstance(query, dict):
+        query_type = query.get('type')
+        canonical = dict()
+        for k, v in iteritems(query):
+            if v is None or k in ('filters', 'filter'):
+                continue
+            canonical[k] = v
+        if query_type in TETRATION_QUERY_COMMUTATIVE_TYPES and 'filters' in query:
+            operands = dict()
+            for item in query['filters'] or []:
+                item_canonical, item_key = _canonicalize(item)
+                # flatten (a and (b and c)) into (a and b and c)
+                if isinstance(item_canonical, dict) and item_canonical.get('type') == query_type and 'filters' in item_canonical:
+                    for nested in item_canonical['filters']:
+                        operands[_serialize(nested)] = nested
+                else:
+                    operands[item_key] = item_canonical
+            # (a and a) is just a
+            if len(operands) == 1:
+                return _canonicalize(list(operands.values())[0])
+            canonical['filters'] = [operands[key] for key in sorted(operands)]
+        elif 'filters' in query:
+            canonical['filters'] = [_canonicalize(item)[0] for item in query['filters'] or []]
+        if 'filter' in query and query['filter'] is not None:
+            canonical['filter'] = _canonicalize(query['filter'])[0]
+        if canonical.get('field') in TETRATION_QUERY_ADDRESS_FIELDS and 'value' in canonical:
+            canonical['value'] = _normalize_address(query_type, canonical['value'])
+        return canonical, _serialize(canonical)
+    elif isinstance(query, list):
+        canonical = [_canonicalize(item)[0] for item in query]
+        return canonical, _serialize(canonical)
+    return query, _serialize(query)
+
+
+def _serialize(obj):
+    return json.dumps(obj, sort_keys=True, separators=(',', ':'))
+
+
+def canonical_query(query):
+    ''' Returns the canonical form of a Tetration filter query
+    Operands of `and`/`or` are flattened, deduplicated and sorted, and address
+    values are written in their normalized form.
+    '''
+    if query is None:
+        return None
+    return _canonicalize(query)[0]
+
+
+def query_hash(query):
+    ''' Returns a stable hash of the canonical form of a Tetration filter query
+    '''
+    if query is None:
+        return None
+    return hashlib.sha1(to_bytes(_canonicalize(query)[1])).hexdigest()
+
+
+def queries_equal(query1, query2):
+    ''' Returns True when both queries match the same inventory
+    '''
+    return query_hash(query1) == query_hash(query2)
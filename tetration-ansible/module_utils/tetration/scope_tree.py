@@ -0,0 +1,76 @@
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+from collections import deque
+
+TETRATION_SCOPE_SEPARATOR = ':'
+
+
+def scope_depth(scope_name):
+    ''' Returns the depth of a fully qualified scope name, 0 being a root scope
+    '''
+    return scope_name.count(TETRATION_SCOPE_SEPARATOR)
+
+
+def parent_scope_name(scope_name):
+    ''' Returns the fully qualified name of the parent scope or None for a
+    root scope
+    '''
+    if TETRATION_SCOPE_SEPARATOR not in scope_name:
+        return None
+    return scope_name.rsplit(TETRATION_SCOPE_SEPARATOR, 1)[0]
+
+
+class TetrationScopeTree(object):
+    ''' Index over the list of scopes returned by /app_scopes
+    The index is built once and then answers lookups by id or name and walks
+    of a subtree without rescanning the list.
+    '''
+    def __init__(self, app_scopes):
+        self.by_id = dict()
+        self.by_name = dict()
+        self.children = dict()
+        for scope in app_scopes or []:
+            self.by_id[scope['id']] = scope
+            self.by_name[scope['name']] = scope
+            if scope.get('parent_app_scope_id'):
+                self.children.setdefault(scope['parent_app_scope_id'], []).append(scope)
+
+    def walk(self, scope_id, max_depth=None):
+        ''' Yields (depth, scope) for the scope and all of its descendants in
+        breadth first order, so scopes come out sorted by depth. Depth is
+        relative to the starting scope and descendants deeper than max_depth
+        are not visited.
+        '''
+        if scope_id not in self.by_id:
+            return
+        queue = deque([(0, self.by_id[scope_id])])
+        while queue:
+            depth, scope = queue.popleft()
+            yield depth, scope
+            if max_depth is None or depth < max_depth:
+                for child in self.children.get(scope['id'], []):
+                    queue.append((depth + 1, child))
@@ -0,0 +1,218 @@
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+from collections import OrderedDict
+from ansible.module_utils.six import string_types
+from ansible.module_utils._text import to_text
+from ansible.module_utils.tetration.policy import TETRATION_POLICY_SECTIONS
+
+try:
+    import ipaddress
+except ImportError:
+    from ansible.module_utils.compat import ipaddress
+
+
+def query_networks(query):
+    ''' Returns the list of networks matched by a query made only of ip/subnet
+    terms joined by `or`, or None if the query needs an inventory search to be
+    resolved
+    '''
+    if not isinstance(query, dict):
+        return None
+    if query.get('type') == 'or':
+        networks = []
+        for item in query.get('filters') or []:
+            item_networks = query_networks(item)
+            if item_networks is None:
+                return None
+            networks.extend(item_networks)
+        return networks
+    if query.get('field') in ('ip', 'address') and query.get('type') in ('eq', 'subnet'):
+        try:
+            return [ipaddress.ip_network(to_text(query['value']), strict=False)]
+        except (ValueError, KeyError):
+            return None
+    return None
+
+
+class LRUMemo(object):
+    ''' Memo holding at most max_size results, evicting the least recently
+    used one, so memory stays bounded however many flows are evaluated
+    '''
+    def __init__(self, max_size=65536):
+        self.max_size = max_size
+        self._items = OrderedDict()
+
+    def get(self, key):
+        ''' Returns the memoized result or None
+        '''
+        try:
+            value = self._items.pop(key)
+        except KeyError:
+            return None
+        self._items[key] = value
+        return value
+
+    def set(self, key, value):
+        self._items[key] = value
+        if len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+        return value
+
+    def clear(self):
+        self._items.clear()
+
+
+class TetrationAddressIndex(object):
+    ''' Maps addresses to the ids of the filters containing them
+    Networks are stored per prefix length, so a lookup costs one dictionary
+    access per distinct prefix length instead of one test per network.
+    Results of the most recently looked up addresses are memoized.
+    '''
+    def __init__(self):
+        self.networks = dict()
+        self._memo = LRUMemo()
+
+    def add(self, filter_id, address):
+        if not isinstance(address, (ipaddress.IPv4Network, ipaddress.IPv6Network)):
+            address = ipaddress.ip_network(to_text(address), strict=False)
+        key = (address.version, address.prefixlen)
+        prefix = int(address.network_address) >> (address.max_prefixlen - address.prefixlen)
+        self.networks.setdefault(key, dict()).setdefault(prefix, set()).add(filter_id)
+        self._memo.clear()
+
+    def lookup(self, address):
+        ''' Returns the frozenset of filter ids containing the address
+        '''
+        filter_ids = self._memo.get(address)
+        if filter_ids is not None:
+            return filter_ids
+        try:
+            ip = ipaddress.ip_address(to_text(address))
+        except ValueError:
+            return self._memo.set(address, frozenset())
+        value = int(ip)
+        filter_ids = set()
+        for (version, prefixlen), prefixes in self.networks.items():
+            if version != ip.version:
+                continue
+            filter_ids.update(prefixes.get(value >> (ip.max_prefixlen - prefixlen), ()))
+        return self._memo.set(address, frozenset(filter_ids))
+
+
+class TetrationPolicySimulator(object):
+    ''' Evaluates flows against the compiled policies of an application
+    Absolute policies are evaluated before default policies, each rank in
+    priority order, and the catch all action applies when nothing matches.
+    Rules are indexed by (consumer_filter_id, provider_filter_id) and their
+    services are compiled to port intervals per protocol.
+    '''
+    def __init__(self, policies, members, protocols=None):
+        ''' policies is the /applications/{id}/policies document and members
+        maps every consumer and provider filter id to a list of addresses or
+        networks. protocols maps protocol names to their numbers.
+        '''
+        self.catch_all_action = policies.get('catch_all_action') or 'DENY'
+        self.protocols = dict((k.upper(), v) for (k, v) in (protocols or dict()).items())
+        self.addresses = TetrationAddressIndex()
+        for filter_id, addresses in members.items():
+            for address in addresses:
+                self.addresses.add(filter_id, address)
+
+        self.rules = []
+        self.rules_by_pair = dict()
+        for section, rank in TETRATION_POLICY_SECTIONS:
+            section_policies = sorted(policies.get(section) or [], key=lambda p: p.get('priority') or 0)
+            for policy in section_policies:
+                services = dict()
+                for param in policy.get('l4_params') or []:
+                    port = param.get('port') or [0, 65535]
+                    services.setdefault(param.get('proto') or None, []).append((port[0], port[-1]))
+                order = len(self.rules)
+                self.rules.append(dict(
+                    id = policy.get('id'),
+                    rank = rank,
+                    priority = policy.get('priority'),
+                    action = policy.get('action'),
+                    consumer_filter_id = policy.get('consumer_filter_id'),
+                    provider_filter_id = policy.get('provider_filter_id'),
+                    services = services
+                ))
+                pair = (policy.get('consumer_filter_id'), policy.get('provider_filter_id'))
+                self.rules_by_pair.setdefault(pair, []).append(order)
+        self._memo = LRUMemo()
+
+    def _protocol(self, proto):
+        if proto is None or proto == '':
+            return None
+        if isinstance(proto, string_types) and not proto.isdigit():
+            return self.protocols.get(proto.upper())
+        return int(proto)
+
+    def _matches(self, rule, proto, port):
+        for rule_proto in (proto, None):
+            for low, high in rule['services'].get(rule_proto, ()):
+                # flows without a port, such as ICMP, match on protocol only
+                if port is None or low <= port <= high:
+                    return True
+        return False
+
+    def evaluate(self, src, dst, proto, port):
+        ''' Returns a tuple of the action applied to the flow and the rule that
+        matched, or None when the catch all action applies
+        '''
+        proto = self._protocol(proto)
+        port = int(port) if port not in (None, '') else None
+        key = (src, dst, proto, port)
+        decision = self._memo.get(key)
+        if decision is not None:
+            return decision
+        consumers = self.addresses.lookup(src)
+        providers = self.addresses.lookup(dst)
+        best = None
+        for consumer in consumers:
+            for provider in providers:
+                for order in self.rules_by_pair.get((consumer, provider), ()):
+                    if best is not None and order >= best:
+                        break
+                    if self._matches(self.rules[order], proto, port):
+                        best = order
+                        break
+        if best is None:
+            return self._memo.set(key, (self.catch_all_action, None))
+        return self._memo.set(key, (self.rules[best]['action'], self.rules[best]))
+
+    def evaluate_flows(self, flows):
+        ''' Yields (flow, action, rule) for every flowsearch result in flows
+        '''
+        for flow in flows:
+            action, rule = self.evaluate(
+                flow.get('src_address'),
+                flow.get('dst_address'),
+                flow.get('proto'),
+                flow.get('dst_port')
+            )
+            yield flow, action, rule
@@ -0,0 +1,598 @@
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+# Local SQLite store holding a snapshot of the configuration of a tenant, so
+# that reports and planning can run offline instead of querying the cluster.
+# Every API object is kept as compact JSON in the objects table, indexed by
+# kind, id and name, and the policies of every application version are also
+# kept in their own table indexed by application and filters.
+#
+# TetrationSnapshotClient answers the reads of the modules from a snapshot,
+# which is how the snapshot provider option plans a playbook offline.
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.module_utils.tetration.api import TETRATION_API_AGENT_CONFIG_INTENTS
+from ansible.module_utils.tetration.api import TETRATION_API_AGENT_CONFIG_PROFILES
+from ansible.module_utils.tetration.api import TETRATION_API_AGENT_NAT_CONFIG
+from ansible.module_utils.tetration.api import TETRATION_API_APPLICATIONS
+from ansible.module_utils.tetration.api import TETRATION_API_APPLICATION_POLICIES
+from ansible.module_utils.tetration.api import TETRATION_API_INTERFACE_INTENTS
+from ansible.module_utils.tetration.api import TETRATION_API_INVENTORY_FILTER
+from ansible.module_utils.tetration.api import TETRATION_API_ROLE
+from ansible.module_utils.tetration.api import TETRATION_API_SCOPES
+from ansible.module_utils.tetration.api import TETRATION_API_TENANT
+from ansible.module_utils.tetration.api import TETRATION_API_USER
+from ansible.module_utils.tetration.json_backend import dumps, loads, response_json
+from ansible.module_utils.tetration.policy import TETRATION_POLICY_SECTIONS
+from ansible.module_utils.tetration.worker import TetrationWorkerResponse
+
+# kind of the objects stored and the collection they are read from
+TETRATION_SNAPSHOT_COLLECTIONS = (
+    ('scopes', TETRATION_API_SCOPES),
+    ('inventory_filters', TETRATION_API_INVENTORY_FILTER),
+    ('applications', TETRATION_API_APPLICATIONS),
+    ('agent_config_profiles', TETRATION_API_AGENT_CONFIG_PROFILES),
+    ('agent_config_intents', TETRATION_API_AGENT_CONFIG_INTENTS),
+    ('interface_intents', TETRATION_API_INTERFACE_INTENTS),
+    ('agent_nat_configs', TETRATION_API_AGENT_NAT_CONFIG),
+    ('users', TETRATION_API_USER),
+    ('roles', TETRATION_API_ROLE),
+    ('tenants', TETRATION_API_TENANT),
+)
+
+# Objects and policies also store the hash of their canonical JSON and the
+# node of the tree they belong to: the scope they are attached to, their
+# application for details and policies, or their kind for objects outside of
+# any scope. Nodes carry a Merkle style hash of their objects and children.
+TETRATION_SNAPSHOT_SCHEMA = (
+    'CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT)',
+    'CREATE TABLE objects (kind TEXT NOT NULL, id TEXT NOT NULL, name TEXT, '
+    'app_scope_id TEXT, node TEXT NOT NULL, hash TEXT NOT NULL, document TEXT NOT NULL, '
+    'PRIMARY KEY (kind, id))',
+    'CREATE INDEX objects_name ON objects (kind, name)',
+    'CREATE INDEX objects_scope ON objects (kind, app_scope_id)',
+    'CREATE INDEX objects_node ON objects (node)',
+    'CREATE TABLE policies (application_id TEXT NOT NULL, version TEXT, rank TEXT, '
+    'id TEXT NOT NULL, priority INTEGER, action TEXT, consumer_filter_id TEXT, '
+    'provider_filter_id TEXT, hash TEXT NOT NULL, document TEXT NOT NULL)',
+    'CREATE INDEX policies_application ON policies (application_id, version)',
+    'CREATE INDEX policies_id ON policies (id)',
+    'CREATE INDEX policies_consumer ON policies (consumer_filter_id)',
+    'CREATE INDEX policies_provider ON policies (provider_filter_id)',
+    'CREATE TABLE nodes (node TEXT PRIMARY KEY, parent TEXT, hash TEXT NOT NULL)',
+    'CREATE INDEX nodes_parent ON nodes (parent)',
+)
+
+
+# collections not returned as a plain list, and the key holding their items
+TETRATION_SNAPSHOT_ENVELOPES = {
+    'interface_intents': 'intents',
+}
+
+# sub resources of an application answered from its details
+TETRATION_SNAPSHOT_APPLICATION_DETAILS = ('clusters', 'inventory_filters')
+
+
+def collection_items(document):
+    ''' Returns the items of a collection, whether the API returned them as a
+    list or in the results of a document
+    '''
+    if isinstance(document, dict):
+        for key in ['results'] + list(TETRATION_SNAPSHOT_ENVELOPES.values()):
+            if key in document:
+                return document[key] or []
+        return []
+    return document or []
+
+
+def canonical_document(document):
+    ''' Returns the JSON of a document with sorted keys, so that two copies of
+    an object compare equal whatever the order of their keys
+    '''
+    return json.dumps(document, sort_keys=True, separators=(',', ':'))
+
+
+def object_hash(obj):
+    return hashlib.sha1(to_bytes(canonical_document(obj))).hexdigest()
+
+
+def object_id(obj):
+    ''' Returns the id of an API object, or the hash of the object for the
+    collections whose items have no id
+    '''
+    if isinstance(obj, dict) and obj.get('id') is not None:
+        return to_text(obj['id'])
+    return object_hash(obj)
+
+
+def object_node(kind, obj):
+    ''' Returns the node of the snapshot tree an object belongs to
+    '''
+    if kind == 'scopes':
+        return 'scope:%s' % object_id(obj)
+    if kind == 'application_details':
+        return 'application:%s' % object_id(obj)
+    if isinstance(obj, dict):
+        app_scope_id = obj.get('app_scope_id') or obj.get('root_app_scope_id')
+        if app_scope_id:
+            return 'scope:%s' % app_scope_id
+    return 'kind:%s' % kind
+
+
+def object_name(obj):
+    if not isinstance(obj, dict):
+        return None
+    return obj.get('name') or obj.get('email')
+
+
+class TetrationSnapshot(object):
+    ''' SQLite snapshot of a tenant
+    A snapshot is written once with create() and commit(), which replaces the
+    file atomically, and then opened read only with open().
+    '''
+    def __init__(self, connection, path, tmp=None):
+        self.connection = connection
+        self.path = path
+        self._tmp = tmp
+
+    @classmethod
+    def create(cls, path):
+        ''' Starts a new snapshot, written to a temporary file next to path
+        until commit()
+        '''
+        path = os.path.expanduser(path)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        os.close(fd)
+        connection = sqlite3.connect(tmp)
+        for statement in TETRATION_SNAPSHOT_SCHEMA:
+            connection.execute(statement)
+        return cls(connection, path, tmp)
+
+    @classmethod
+    def open(cls, path):
+        path = os.path.expanduser(path)
+        if not os.path.exists(path):
+            raise IOError('snapshot not found: %s' % path)
+        # the modules read the snapshot from the threads of run_method_batch
+        return cls(sqlite3.connect(path, check_same_thread=False), path)
+
+    def commit(self):
+        self.index_nodes()
+        self.connection.commit()
+        self.connection.close()
+        os.rename(self._tmp, self.path)
+        self._tmp = None
+
+    def close(self):
+        self.connection.close()
+        if self._tmp:
+            os.remove(self._tmp)
+            self._tmp = None
+
+    # =========================================================================
+    # Writing
+    def set_metadata(self, **metadata):
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)',
+            [(key, dumps(value)) for key, value in metadata.items()]
+        )
+
+    def add_objects(self, kind, objects):
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO objects (kind, id, name, app_scope_id, node, hash, document) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(kind, object_id(obj), object_name(obj),
+              obj.get('app_scope_id') if isinstance(obj, dict) else None,
+              object_node(kind, obj), object_hash(obj), dumps(obj))
+             for obj in objects]
+        )
+
+    def add_policies(self, application_id, version, policies):
+        ''' Stores the policies of an application version, from a document
+        holding absolute_policies and default_policies such as the details of
+        the application
+        '''
+        rows = []
+        for section, rank in TETRATION_POLICY_SECTIONS:
+            for policy in policies.get(section) or []:
+                rows.append((
+                    application_id,
+                    to_text(version) if version is not None else None,
+                    rank,
+                    object_id(policy),
+                    policy.get('priority'),
+                    policy.get('action'),
+                    policy.get('consumer_filter_id'),
+                    policy.get('provider_filter_id'),
+                    object_hash(policy),
+                    dumps(policy)
+                ))
+        self.connection.executemany(
+            'INSERT INTO policies (application_id, version, rank, id, priority, action, '
+            'consumer_filter_id, provider_filter_id, hash, document) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            rows
+        )
+
+    def index_nodes(self):
+        ''' Computes the hash of every node of the snapshot tree from the
+        hashes of its objects, its policies and its children, so that two
+        snapshots with the same node hash hold the same subtree
+        '''
+        parents = dict()
+        for scope in self.objects('scopes'):
+            parent_id = scope.get('parent_app_scope_id')
+            parents['scope:%s' % object_id(scope)] = 'scope:%s' % parent_id if parent_id else None
+        for application in self.objects('applications'):
+            node = 'application:%s' % object_id(application)
+            parents[node] = 'scope:%s' % application['app_scope_id'] if application.get('app_scope_id') else None
+
+        entries = dict()
+        for node, kind, id, digest in self.connection.execute('SELECT node, kind, id, hash FROM objects'):
+            entries.setdefault(node, []).append('%s %s %s' % (kind, id, digest))
+        for application_id, id, digest in self.connection.execute('SELECT application_id, id, hash FROM policies'):
+            entries.setdefault('application:%s' % application_id, []).append('policies %s %s' % (id, digest))
+        for node in entries:
+            parents.setdefault(node, None)
+        # children whose parent is missing from the snapshot become roots
+        for node, parent in list(parents.items()):
+            if parent is not None and parent not in parents:
+                parents[node] = None
+
+        children = dict()
+        for node, parent in parents.items():
+            children.setdefault(parent, []).append(node)
+
+        hashes = dict()
+        # post order walk, children before their parent
+        stack = [(node, False) for node in children.get(None, [])]
+        while stack:
+            node, visited = stack.pop()
+            if not visited:
+                stack.append((node, True))
+                stack.extend((child, False) for child in children.get(node, []))
+                continue
+            lines = sorted(entries.get(node, []))
+            lines.extend(sorted('node %s %s' % (child, hashes[child]) for child in children.get(node, [])))
+            hashes[node] = hashlib.sha1(to_bytes('\n'.join(lines))).hexdigest()
+
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO nodes (node, parent, hash) VALUES (?, ?, ?)',
+            [(node, parents[node], hashes[node]) for node in hashes]
+        )
+
+    # =========================================================================
+    # Reading
+    def metadata(self):
+        return dict(
+            (key, loads(value))
+            for key, value in self.connection.execute('SELECT key, value FROM metadata')
+        )
+
+    def count(self, kind):
+        return self.connection.execute('SELECT COUNT(*) FROM objects WHERE kind = ?', (kind,)).fetchone()[0]
+
+    def objects(self, kind, app_scope_id=None):
+        if app_scope_id is None:
+            cursor = self.connection.execute('SELECT document FROM objects WHERE kind = ?', (kind,))
+        else:
+            cursor = self.connection.execute(
+                'SELECT document FROM objects WHERE kind = ? AND app_scope_id = ?', (kind, app_scope_id))
+        return [loads(document) for (document,) in cursor]
+
+    def get(self, kind, id):
+        row = self.connection.execute(
+            'SELECT document FROM objects WHERE kind = ? AND id = ?', (kind, to_text(id))).fetchone()
+        return loads(row[0]) if row else None
+
+    def node_hash(self, node):
+        row = self.connection.execute('SELECT hash FROM nodes WHERE node = ?', (node,)).fetchone()
+        return row[0] if row else None
+
+    def node_children(self, node):
+        ''' Returns the nodes whose parent is node, or the roots when node is
+        None
+        '''
+        if node is None:
+            cursor = self.connection.execute('SELECT node FROM nodes WHERE parent IS NULL')
+        else:
+            cursor = self.connection.execute('SELECT node FROM nodes WHERE parent = ?', (node,))
+        return [child for (child,) in cursor]
+
+    def node_entries(self, node):
+        ''' Returns the hash of the objects and policies held directly by a
+        node, by (kind, id)
+        '''
+        entries = dict(
+            ((kind, id), digest)
+            for kind, id, digest in self.connection.execute(
+                'SELECT kind, id, hash FROM objects WHERE node = ?', (node,))
+        )
+        if node.startswith('application:'):
+            entries.update(
+                (('policies', id), digest)
+                for id, digest in self.connection.execute(
+                    'SELECT id, hash FROM policies WHERE application_id = ?', (node.split(':', 1)[1],))
+            )
+        return entries
+
+    def policy(self, id):
+        row = self.connection.execute(
+            'SELECT document FROM policies WHERE id = ?', (to_text(id),)).fetchone()
+        return loads(row[0]) if row else None
+
+    def find(self, kind, name):
+        return [loads(document) for (document,) in self.connection.execute(
+            'SELECT document FROM objects WHERE kind = ? AND name = ?', (kind, name))]
+
+    def policies(self, application_id, version=None):
+        ''' Returns the policies of an application, in the sections of the
+        /applications/{id}/policies document
+        '''
+        query = 'SELECT rank, document FROM policies WHERE application_id = ?'
+        args = [application_id]
+        if version is not None:
+            query += ' AND version = ?'
+            args.append(to_text(version))
+        result = dict((section, []) for section, _ in TETRATION_POLICY_SECTIONS)
+        sections = dict((rank, section) for section, rank in TETRATION_POLICY_SECTIONS)
+        for rank, document in self.connection.execute(query + ' ORDER BY rank, priority', args):
+            result[sections[rank]].append(loads(document))
+        return result
+
+
+# snapshots opened by this process, by path and modification time
+_SNAPSHOTS = dict()
+
+
+class TetrationSnapshotJournal(object):
+    ''' Paths of the objects written while applying a plan made against a
+    snapshot. They are kept in a file next to the snapshot, so that every task
+    and worker process of the run knows the objects that no longer match the
+    snapshot. The file starts with the modification time and size of the
+    snapshot and is ignored once the snapshot is exported again.
+    '''
+    def __init__(self, snapshot_path):
+        self.path = snapshot_path + '.written'
+        stat = os.stat(snapshot_path)
+        self.identity = '%r %d' % (stat.st_mtime, stat.st_size)
+        self.lock = threading.Lock()
+        self._paths = set()
+        self._size = None
+
+    def _load(self):
+        try:
+            size = os.stat(self.path).st_size
+        except OSError:
+            self._paths, self._size = set(), None
+            return
+        if size == self._size:
+            return
+        with open(self.path, 'r') as f:
+            lines = f.read().splitlines()
+        self._paths = set(lines[1:]) if lines and lines[0] == self.identity else set()
+        self._size = size
+
+    def __contains__(self, object_path):
+        with self.lock:
+            self._load()
+            return object_path in self._paths
+
+    def add(self, object_path):
+        with self.lock:
+            self._load()
+            if object_path in self._paths:
+                return
+            if self._size is None or not self._paths:
+                with open(self.path, 'w') as f:
+                    f.write(self.identity + '\n')
+            # appends of one short line are atomic, whichever process writes
+            with open(self.path, 'a') as f:
+                f.write(object_path + '\n')
+            self._paths.add(object_path)
+
+
+class TetrationSnapshotClient(object):
+    ''' Drop in replacement for tetpyclient.RestClient reading from a snapshot
+    GET requests on the collections of the snapshot, their objects and the
+    details, clusters and policies of the applications are answered locally.
+    Without a live client the snapshot is read only, which is enough to plan
+    a playbook in check mode without any API call.
+
+    With a live client, writes are forwarded to the cluster once the object
+    they change has been read again and found identical to the snapshot;
+    otherwise they fail with 412 Precondition Failed. Collections are read
+    from the cluster, so that objects created since the snapshot, including by
+    earlier tasks, are found instead of being created again. Objects written
+    during the run, as recorded in the TetrationSnapshotJournal, and anything
+    the snapshot does not hold are read from the cluster too. Objects created
+    by a POST on a collection are journaled under the id the cluster returned.
+    '''
+    def __init__(self, path, live=None):
+        path = os.path.abspath(os.path.expanduser(path))
+        key = (path, os.stat(path).st_mtime)
+        if key not in _SNAPSHOTS:
+            _SNAPSHOTS[key] = (TetrationSnapshot.open(path), dict())
+        self.snapshot, self._documents = _SNAPSHOTS[key]
+        self.live = live
+        self.written = TetrationSnapshotJournal(path) if live is not None else set()
+        self.lock = threading.Lock()
+        self.server_endpoint = getattr(live, 'server_endpoint', None)
+        self.api_key = getattr(live, 'api_key', None)
+
+    @staticmethod
+    def _split(uri_path):
+        path = uri_path.split('?', 1)[0].rstrip('/')
+        if path.startswith('/openapi/'):
+            path = '/' + path.split('/', 3)[-1]
+        # longest collection first, /inventory_config/interface_intents
+        # before /inventory_config/intents
+        for kind, target in sorted(TETRATION_SNAPSHOT_COLLECTIONS, key=lambda c: -len(c[1])):
+            if path == target:
+                return kind, target, []
+            if path.startswith(target + '/'):
+                return kind, target, path[len(target) + 1:].split('/')
+        if path.startswith(TETRATION_API_APPLICATION_POLICIES + '/'):
+            return 'policies', TETRATION_API_APPLICATION_POLICIES, path[len(TETRATION_API_APPLICATION_POLICIES) + 1:].split('/')
+        return None, path, None
+
+    def object_path(self, uri_path):
+        ''' Returns the path of the object a request applies to, such as
+        /app_scopes/{id} for /app_scopes/{id}/commit_dirty, or None for
+        requests on a whole collection or outside the snapshot
+        '''
+        kind, target, parts = self._split(uri_path)
+        if not kind or not parts:
+            return None
+        return '%s/%s' % (target, parts[0])
+
+    def _resolve(self, uri_path, params):
+        ''' Returns a tuple (known, document) where known tells whether the
+        snapshot holds the path at all
+        '''
+        kind, target, parts = self._split(uri_path)
+        if not kind:
+            return False, None
+        if kind == 'policies':
+            return len(parts) == 1, self.snapshot.policy(parts[0])
+        if not parts:
+            items = self.snapshot.objects(kind)
+            if kind == 'users' and not (params or dict()).get('include_disabled'):
+                items = [user for user in items if not user.get('disabled_at')]
+            if kind in TETRATION_SNAPSHOT_ENVELOPES:
+                return True, {TETRATION_SNAPSHOT_ENVELOPES[kind]: items}
+            return True, items
+        if len(parts) == 1:
+            return True, self.snapshot.get(kind, parts[0])
+        if kind == 'applications' and len(parts) == 2:
+            if self.snapshot.count('application_details') == 0:
+                return False, None
+            # the snapshot only holds the latest version of the applications
+            version = (params or dict()).get('version')
+            application = self.snapshot.get('applications', parts[0])
+            if version is not None and application and to_text(version) != to_text(application.get('latest_adm_version')):
+                return False, None
+            details = self.snapshot.get('application_details', parts[0])
+            if parts[1] == 'details':
+                return True, details
+            if parts[1] in TETRATION_SNAPSHOT_APPLICATION_DETAILS:
+                return True, details.get(parts[1]) if details else None
+            if parts[1] == 'policies':
+                return True, self.snapshot.policies(parts[0]) if details else None
+            if parts[1] in [section for section, _ in TETRATION_POLICY_SECTIONS]:
+                return True, self.snapshot.policies(parts[0])[parts[1]] if details else None
+        return False, None
+
+    def document(self, uri_path, params=None):
+        key = (uri_path, canonical_document(params))
+        with self.lock:
+            if key not in self._documents:
+                self._documents[key] = self._resolve(uri_path, params)
+            return self._documents[key]
+
+    def get(self, uri_path, **kwargs):
+        params = kwargs.get('params')
+        object_path = self.object_path(uri_path)
+        if self.live is not None and (not object_path or object_path in self.written):
+            return self.live.get(uri_path, **kwargs)
+        known, document = self.document(uri_path, params)
+        if self.live is not None and (not known or document is None):
+            return self.live.get(uri_path, **kwargs)
+        if not known:
+            return TetrationWorkerResponse(404, 'Not Found', dumps(dict(
+                error='%s is not part of the snapshot %s' % (uri_path, self.snapshot.path))))
+        if document is None:
+            return TetrationWorkerResponse(404, 'Not Found', dumps(dict(error='%s not found' % uri_path)))
+        return TetrationWorkerResponse(200, 'OK', dumps(document))
+
+    def revalidate(self, uri_path):
+        ''' Reads the object changed by a request from the cluster and
+        returns an error message when it differs from the snapshot
+        '''
+        object_path = self.object_path(uri_path)
+        if not object_path or object_path in self.written:
+            return None
+        known, expected = self.document(object_path)
+        if not known:
+            return None
+        resp = self.live.get(object_path)
+        if resp.status_code == 404 and expected is None:
+            return None
+        if resp.status_code != 200 and resp.status_code != 404:
+            return 'Unable to revalidate %s: %s' % (object_path, resp.text)
+        if resp.status_code == 404:
+            return '%s was deleted since the snapshot %s was taken, export a new snapshot and plan again' % (
+                object_path, self.snapshot.path)
+        # single objects may carry more or fewer fields than the collection
+        # items stored in the snapshot, so only the fields of both are compared
+        current = response_json(resp)
+        if isinstance(current, dict) and isinstance(expected, dict):
+            keys = set(current) & set(expected)
+            current = dict((key, current[key]) for key in keys)
+            expected = dict((key, expected[key]) for key in keys)
+        if canonical_document(current) != canonical_document(expected):
+            return '%s changed since the snapshot %s was taken, export a new snapshot and plan again' % (
+                object_path, self.snapshot.path)
+        return None
+
+    def _write(self, method, uri_path, **kwargs):
+        if self.live is None:
+            return TetrationWorkerResponse(405, 'Method Not Allowed', dumps(dict(
+                error='%s %s not sent, the snapshot %s is read only' % (method.upper(), uri_path, self.snapshot.path))))
+        error = self.revalidate(uri_path)
+        if error:
+            return TetrationWorkerResponse(412, 'Precondition Failed', dumps(dict(error=error)))
+        object_path = self.object_path(uri_path)
+        if object_path:
+            self.written.add(object_path)
+        resp = getattr(self.live, method)(uri_path, **kwargs)
+        kind, target, parts = self._split(uri_path)
+        if kind and not parts and method == 'post' and resp.status_code // 100 == 2:
+            # objects created by the run are not in the snapshot, later
+            # writes on them must not be revalidated
+            try:
+                created = response_json(resp)
+            except ValueError:
+                created = None
+            if isinstance(created, dict) and created.get('id') is not None:
+                self.written.add('%s/%s' % (target, created['id']))
+        return resp
+
+    def post(self, uri_path, **kwargs):
+        return self._write('post', uri_path, **kwargs)
+
+    def put(self, uri_path, **kwargs):
+        return self._write('put', uri_path, **kwargs)
+
+    def delete(self, uri_path, **kwargs):
+        return self._write('delete', uri_path, **kwargs)
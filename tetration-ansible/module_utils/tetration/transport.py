@@ -0,0 +1,178 @@
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+# Transport adapter for the requests session of a tetpyclient RestClient.
+# Request bodies can optionally be sent gzip compressed to clusters accepting
+# Content-Encoding: gzip, while responses are already requested with gzip or
+# deflate by the default headers of the requests session. Bytes sent and
+# received are counted per client so that modules can report the compression
+# achieved. tetpyclient does not take request headers, so the adapter also
+# adds the headers set for the current thread, such as the validators of a
+# conditional get, and can leave the body of the responses of the current
+# thread unread, to be streamed to a file.
+
+import threading
+import zlib
+
+from requests.adapters import HTTPAdapter
+from ansible.module_utils._text import to_bytes
+
+# request bodies smaller than this are not worth compressing
+TETRATION_COMPRESS_MIN_SIZE = 1024
+
+TETRATION_TRANSFER_COUNTERS = (
+    'requests',
+    'request_bytes',
+    'request_bytes_sent',
+    'response_bytes',
+    'response_bytes_received',
+)
+
+
+def gzip_compress(data):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+class TetrationTransportAdapter(HTTPAdapter):
+    ''' Transport adapter compressing request bodies, adding per thread extra
+    headers and counting the bytes transferred before and after compression
+    '''
+    def __init__(self, compress_requests=False, **kwargs):
+        self.compress_requests = compress_requests
+        self.stats = dict((counter, 0) for counter in TETRATION_TRANSFER_COUNTERS)
+        self.extra_headers = threading.local()
+        self.streamed = threading.local()
+        self._lock = threading.Lock()
+        super(TetrationTransportAdapter, self).__init__(**kwargs)
+
+    def count(self, **counters):
+        with self._lock:
+            for counter, value in counters.items():
+                self.stats[counter] += value
+
+    def send(self, request, **kwargs):
+        # headers added after the request was signed, the signature does not
+        # cover them
+        request.headers.update(getattr(self.extra_headers, 'headers', None) or dict())
+        body = to_bytes(request.body) if request.body else b''
+        sent = body
+        # the X-Tetration-Cksum header was computed on the uncompressed body
+        if self.compress_requests and len(body) >= TETRATION_COMPRESS_MIN_SIZE \
+                and 'Content-Encoding' not in request.headers:
+            sent = gzip_compress(body)
+            request.body = sent
+            request.headers['Content-Encoding'] = 'gzip'
+            request.headers['Content-Length'] = str(len(sent))
+        response = super(TetrationTransportAdapter, self).send(request, **kwargs)
+        received = 0
+        decoded = 0
+        if not kwargs.get('stream'):
+            decoded = len(response.content)
+            try:
+                received = response.raw.tell()
+            except (AttributeError, ValueError):
+                received = decoded
+        self.count(
+            requests=1,
+            request_bytes=len(body),
+            request_bytes_sent=len(sent),
+            response_bytes=decoded,
+            response_bytes_received=received
+        )
+        return response
+
+
+def mount_transport_adapter(rest_client, compress_requests=False):
+    ''' Mounts the transport adapter on the session of a RestClient, exposing
+    its counters as rest_client.transfer_stats and its per thread headers as
+    rest_client.extra_headers
+    '''
+    adapter = TetrationTransportAdapter(compress_requests=compress_requests)
+    rest_client.session.mount('https://', adapter)
+    rest_client.session.mount('http://', adapter)
+    rest_client.transfer_stats = adapter.stats
+    rest_client.extra_headers = adapter.extra_headers
+    rest_client.transport_adapter = adapter
+
+    # tetpyclient does not take a stream argument, so it is set here for the
+    # requests made by stream_response
+    send = rest_client.session.send
+
+    def send_streamed(request, **kwargs):
+        if getattr(adapter.streamed, 'enabled', False):
+            kwargs['stream'] = True
+        return send(request, **kwargs)
+    rest_client.session.send = send_streamed
+    return rest_client
+
+
+def stream_response(rest_client, method, *args, **kwargs):
+    ''' Calls a method of the RestClient leaving the body of the response
+    unread, to be consumed with iter_content. Clients without the transport
+    adapter, such as the worker client, return a response already read.
+    '''
+    adapter = getattr(rest_client, 'transport_adapter', None)
+    if adapter is None:
+        return getattr(rest_client, method)(*args, **kwargs)
+    adapter.streamed.enabled = True
+    try:
+        return getattr(rest_client, method)(*args, **kwargs)
+    finally:
+        adapter.streamed.enabled = False
+
+
+def count_streamed_response(rest_client, response, decoded):
+    ''' Counts the bytes of a response returned by stream_response once its
+    body of decoded bytes was consumed
+    '''
+    adapter = getattr(rest_client, 'transport_adapter', None)
+    if adapter is None:
+        return
+    try:
+        received = response.raw.tell()
+    except (AttributeError, ValueError):
+        received = decoded
+    adapter.count(response_bytes=decoded, response_bytes_received=received)
+
+
+def transfer_summary(stats, since=None):
+    ''' Returns the transfer counters, less the counters of since when given,
+    along with the compression ratio of the responses and the bytes saved
+    '''
+    summary = dict(
+        (counter, stats[counter] - (since or dict()).get(counter, 0))
+        for counter in TETRATION_TRANSFER_COUNTERS
+    )
+    summary['response_ratio'] = round(
+        float(summary['response_bytes']) / summary['response_bytes_received'], 2
+    ) if summary['response_bytes_received'] else None
+    summary['bytes_saved'] = (
+        summary['response_bytes'] - summary['response_bytes_received'] +
+        summary['request_bytes'] - summary['request_bytes_sent']
+    )
+    return summary
@@ -0,0 +1,129 @@
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+# Users and roles of a cluster indexed for the bulk user modules, which read
+# both collections once per task instead of once per user.
+
+import hashlib
+import json
+
+from ansible.module_utils._text import to_bytes
+from ansible.module_utils.tetration.api import TETRATION_API_ROLE
+from ansible.module_utils.tetration.api import TETRATION_API_USER
+
+# abilities accepted by the role modules and their name in the API
+TETRATION_ROLE_CAPABILITIES = {
+    'read': 'SCOPE_READ',
+    'write': 'SCOPE_WRITE',
+    'execute': 'EXECUTE',
+    'developer': 'DEVELOPER',
+    'enforce': 'ENFORCE',
+    'owner': 'SCOPE_OWNER',
+}
+
+
+def capability_set(capabilities):
+    ''' Returns the set of (ability, app_scope_id) of a list of capabilities
+    '''
+    return set((capability['ability'], capability['app_scope_id']) for capability in capabilities or [])
+
+
+def capability_set_hash(capabilities):
+    ''' Returns a hash of a set of (ability, app_scope_id), independent of the
+    order of the capabilities, so that two roles with the same capabilities
+    compare with a single string comparison
+    '''
+    canonical = json.dumps(sorted(capabilities), separators=(',', ':'))
+    return hashlib.sha1(to_bytes(canonical)).hexdigest()
+
+
+def operation_rounds(operations, key):
+    ''' Splits operations into rounds in which no two operations share the
+    same key, keeping the order of the operations of each key. Operations of
+    a round can run in parallel, while the operations on one user, such as
+    role additions, run one after the other.
+    '''
+    rounds = []
+    counts = dict()
+    for operation in operations:
+        index = counts.get(key(operation), 0)
+        counts[key(operation)] = index + 1
+        if index == len(rounds):
+            rounds.append([])
+        rounds[index].append(operation)
+    return rounds
+
+
+class TetrationUserIndex(object):
+    ''' Users indexed by email and id, and roles indexed by id and name
+    Role names are only unique within a scope, so a name is resolved among
+    the roles of the scope given first and then among all roles.
+    '''
+    def __init__(self, users=None, roles=None):
+        self.by_email = dict()
+        self.by_id = dict()
+        for user in users or []:
+            self.by_email[user['email']] = user
+            self.by_id[user['id']] = user
+        self.roles_by_id = dict()
+        self.roles_by_name = dict()
+        for role in roles or []:
+            self.roles_by_id[role['id']] = role
+            self.roles_by_name.setdefault(role['name'], []).append(role)
+
+    def find(self, email=None, id=None):
+        if id:
+            return self.by_id.get(id)
+        return self.by_email.get(email)
+
+    def resolve_role(self, name, app_scope_id=None):
+        ''' Returns the id of the role called name, or None if there is no
+        such role or the name is ambiguous
+        '''
+        candidates = self.roles_by_name.get(name) or []
+        if app_scope_id:
+            scoped = [role for role in candidates if role.get('app_scope_id') == app_scope_id]
+            if len(scoped) == 1:
+                return scoped[0]['id']
+        if len(candidates) == 1:
+            return candidates[0]['id']
+        return None
+
+    @classmethod
+    def from_api(cls, tet_module):
+        ''' Builds the index from one read of the users, including disabled
+        ones, and one read of the roles, made in parallel
+        '''
+        responses = tet_module.run_method_batch([
+            dict(method_name='get', target=TETRATION_API_USER, params=dict(include_disabled='true')),
+            dict(method_name='get', target=TETRATION_API_ROLE),
+        ], concurrency=2)
+        for response in responses:
+            if not response['ok']:
+                tet_module.module.fail_json(msg=response['msg'], code=response['status_code'], operation='get')
+        users, roles = [response['json'] or [] for response in responses]
+        return cls(users, roles)
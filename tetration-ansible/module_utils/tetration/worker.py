@@ -0,0 +1,114 @@
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+# Client side of the tetration-api-worker daemon. This file only depends on
+# the standard library so that modules talking to the worker do not need to
+# import tetpyclient or requests.
+
+import json
+import socket
+
+
+class TetrationWorkerError(Exception):
+    pass
+
+
+class TetrationWorkerResponse(object):
+    ''' Response returned by the worker, exposing the subset of the
+    requests.Response interface used by the tetration modules
+    '''
+    def __init__(self, status_code, reason, text):
+        self.status_code = status_code
+        self.reason = reason
+        self.text = text
+        self.headers = dict()
+
+    @property
+    def content(self):
+        return self.text.encode('utf-8')
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def iter_content(self, chunk_size=1):
+        content = self.content
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class TetrationWorkerClient(object):
+    ''' Drop in replacement for tetpyclient.RestClient forwarding every call
+    to a tetration-api-worker listening on a Unix socket. The worker keeps one
+    warm RestClient per provider, so no TLS handshake or client setup happens
+    in the module process.
+    '''
+    def __init__(self, socket_path, **provider):
+        self.socket_path = socket_path
+        self.provider = provider
+        self.server_endpoint = provider.get('server_endpoint')
+        self.api_key = provider.get('api_key')
+
+    def _request(self, method, uri_path, params=None, json_body=None):
+        request = dict(
+            provider=self.provider,
+            method=method,
+            target=uri_path,
+            params=params,
+            json_body=json_body,
+        )
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+            sock.sendall((json.dumps(request) + '\n').encode('utf-8'))
+            sock.shutdown(socket.SHUT_WR)
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        finally:
+            sock.close()
+        response = json.loads(b''.join(chunks).decode('utf-8'))
+        if 'error' in response:
+            raise TetrationWorkerError(response['error'])
+        return TetrationWorkerResponse(response['status_code'], response['reason'], response['text'])
+
+    def get(self, uri_path, **kwargs):
+        return self._request('get', uri_path, params=kwargs.get('params'))
+
+    def post(self, uri_path, **kwargs):
+        return self._request('post', uri_path, json_body=kwargs.get('json_body'))
+
+    def put(self, uri_path, **kwargs):
+        return self._request('put', uri_path, json_body=kwargs.get('json_body'))
+
+    def delete(self, uri_path, **kwargs):
+        return self._request('delete', uri_path, json_body=kwargs.get('json_body'))
@@ -0,0 +1,69 @@
+# Guards the lazy imports of the tetration modules: tetpyclient, requests and
+# the other heavy dependencies are only loaded once a code path needs them,
+# see bin/tetration-import-benchmark for the import times.
+# Run from the repository root with:
+#   python -m unittest discover -s tetration-ansible/tests/unit
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import glob
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+
+HEAVY_MODULES = ('tetpyclient', 'requests', 'multiprocessing.pool', 'ansible.utils.display')
+
+# imports each file in turn, the way Ansible does, and reports the heavy
+# dependencies loaded by each one
+PROBE = r'''
+import json, sys
+import ansible.module_utils
+ansible.module_utils.__path__.append(sys.argv[1])
+try:
+    from importlib.util import spec_from_file_location, module_from_spec
+except ImportError:
+    from imp import load_source
+else:
+    def load_source(name, path):
+        spec = spec_from_file_location(name, path)
+        spec.loader.exec_module(module_from_spec(spec))
+heavy = json.loads(sys.argv[2])
+loaded = dict()
+for path in sys.argv[3:]:
+    load_source('probe_%d' % len(loaded), path)
+    loaded[path] = [name for name in heavy if name in sys.modules]
+    for name in loaded[path]:
+        del sys.modules[name]
+print(json.dumps(loaded))
+'''
+
+
+def heavy_imports(paths):
+    output = subprocess.check_output(
+        [sys.executable, '-c', PROBE, os.path.join(BASE_DIR, 'module_utils'), json.dumps(HEAVY_MODULES)] + paths
+    )
+    loaded = json.loads(output.decode('utf-8'))
+    return dict((os.path.basename(path), names) for path, names in loaded.items() if names)
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_module_utils(self):
+        # transport.py is the requests adapter, only imported with the client
+        paths = sorted(path for path in glob.glob(os.path.join(BASE_DIR, 'module_utils', 'tetration', '*.py'))
+                       if os.path.basename(path) != 'transport.py')
+        self.assertIn('protocols.py', [os.path.basename(path) for path in paths])
+        self.assertEqual(heavy_imports(paths), dict())
+
+    def test_modules(self):
+        paths = sorted(glob.glob(os.path.join(BASE_DIR, 'library', 'tetration_*.py')))
+        self.assertEqual(heavy_imports(paths), dict())
+
+
+if __name__ == '__main__':
+    unittest.main()
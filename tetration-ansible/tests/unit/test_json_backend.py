@@ -0,0 +1,54 @@
+# Unit tests of module_utils/tetration/json_backend.py
+# Run from the repository root with:
+#   python -m unittest discover -s tetration-ansible/tests/unit
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import io
+import json
+import os
+import unittest
+
+import ansible.module_utils
+ansible.module_utils.__path__.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'module_utils'))
+
+from ansible.module_utils.tetration.json_backend import iter_array
+
+RECORDS = [
+    {'id': 'p1', 'l4_params': [{'proto': 6, 'port': [443, 443]}], 'ratio': -2.5e3},
+    u'quote " backslash \\ and ]},: in a string é',
+    [], {}, 0.125, True, None, 12345678901234567890,
+]
+
+
+def iterate(text, chunk_size):
+    return list(iter_array(io.StringIO(text), chunk_size=chunk_size, key='results'))
+
+
+class TestIterArray(unittest.TestCase):
+
+    def test_array(self):
+        for indent in (None, 2):
+            text = json.dumps(RECORDS, indent=indent)
+            for chunk_size in (1, 2, 3, 7, 65536):
+                self.assertEqual(iterate(text, chunk_size), RECORDS)
+
+    def test_results_member(self):
+        text = json.dumps({'offset': 'a]"{', 'other': {'results': [1]}, 'results': RECORDS, 'after': [1, 2]})
+        for chunk_size in (1, 3, 65536):
+            self.assertEqual(iterate(text, chunk_size), RECORDS)
+
+    def test_object_without_results(self):
+        text = json.dumps({'id': 'a1', 'absolute_policies': RECORDS * 10})
+        for chunk_size in (1, 3, 65536):
+            self.assertRaises(ValueError, iterate, text, chunk_size)
+
+    def test_invalid(self):
+        for text in ('[1,', '[1 2]', '{"results": [1,]', '[tru]', '["abc', '"results"'):
+            self.assertRaises(ValueError, iterate, text, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
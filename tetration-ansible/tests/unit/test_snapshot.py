@@ -0,0 +1,115 @@
+# Unit tests of module_utils/tetration/snapshot.py
+# Run from the repository root with:
+#   python -m unittest discover -s tetration-ansible/tests/unit
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import ansible.module_utils
+ansible.module_utils.__path__.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'module_utils'))
+
+from ansible.module_utils.tetration.json_backend import dumps, loads
+from ansible.module_utils.tetration.snapshot import TetrationSnapshot
+from ansible.module_utils.tetration.snapshot import TetrationSnapshotClient
+from ansible.module_utils.tetration.worker import TetrationWorkerResponse
+
+
+class FakeCluster(object):
+    ''' Live client keeping the objects of a few collections in memory
+    '''
+    def __init__(self, collections):
+        self.collections = collections
+        self.requests = []
+
+    def _find(self, uri_path):
+        target, _, id = uri_path.partition('/')[2].partition('/')
+        for obj in self.collections.get('/' + target, []):
+            if obj['id'] == id.split('/')[0]:
+                return obj
+        return None
+
+    def get(self, uri_path, **kwargs):
+        self.requests.append(('GET', uri_path))
+        if uri_path in self.collections:
+            return TetrationWorkerResponse(200, 'OK', dumps(self.collections[uri_path]))
+        obj = self._find(uri_path)
+        if obj is None:
+            return TetrationWorkerResponse(404, 'Not Found', dumps(dict(error='not found')))
+        return TetrationWorkerResponse(200, 'OK', dumps(obj))
+
+    def post(self, uri_path, **kwargs):
+        self.requests.append(('POST', uri_path))
+        payload = loads(kwargs.get('json_body') or 'null') or dict()
+        if uri_path in self.collections:
+            payload['id'] = 'new%d' % len(self.requests)
+            self.collections[uri_path].append(payload)
+        else:
+            obj = self._find(uri_path)
+            obj.setdefault('capabilities', []).append(payload)
+        return TetrationWorkerResponse(200, 'OK', dumps(payload))
+
+    def put(self, uri_path, **kwargs):
+        self.requests.append(('PUT', uri_path))
+        obj = self._find(uri_path)
+        obj.update(loads(kwargs.get('json_body') or 'null') or dict())
+        return TetrationWorkerResponse(200, 'OK', dumps(obj))
+
+
+class TestSnapshotClientApply(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'snapshot.sqlite')
+        roles = [dict(id='r1', name='Reader', app_scope_id='s1', capabilities=[])]
+        snapshot = TetrationSnapshot.create(self.path)
+        snapshot.add_objects('roles', roles)
+        snapshot.commit()
+        self.cluster = FakeCluster({'/roles': [dict(role) for role in roles]})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def client(self):
+        # every task of a run builds its own client
+        return TetrationSnapshotClient(self.path, live=self.cluster)
+
+    def test_create_then_modify(self):
+        resp = self.client().post('/roles', json_body=dumps(dict(name='Writer', app_scope_id='s1')))
+        self.assertEqual(resp.status_code, 200)
+        role_id = loads(resp.content)['id']
+        resp = self.client().post('/roles/%s/capabilities' % role_id,
+                                  json_body=dumps(dict(ability='SCOPE_READ', app_scope_id='s1')))
+        self.assertEqual(resp.status_code, 200)
+
+    def test_modify_twice(self):
+        for description in ('first', 'second'):
+            resp = self.client().put('/roles/r1', json_body=dumps(dict(description=description)))
+            self.assertEqual(resp.status_code, 200)
+        self.assertEqual(loads(self.client().get('/roles/r1').content)['description'], 'second')
+
+    def test_created_object_is_found(self):
+        self.client().post('/roles', json_body=dumps(dict(name='Writer', app_scope_id='s1')))
+        names = [role['name'] for role in loads(self.client().get('/roles').content)]
+        self.assertEqual(sorted(names), ['Reader', 'Writer'])
+
+    def test_changed_since_snapshot(self):
+        self.cluster.collections['/roles'][0]['name'] = 'Renamed elsewhere'
+        resp = self.client().put('/roles/r1', json_body=dumps(dict(description='mine')))
+        self.assertEqual(resp.status_code, 412)
+        self.assertNotIn(('PUT', '/roles/r1'), self.cluster.requests)
+
+    def test_check_mode_is_read_only(self):
+        client = TetrationSnapshotClient(self.path)
+        self.assertEqual(client.post('/roles', json_body=dumps(dict(name='Writer'))).status_code, 405)
+        self.assertEqual(loads(client.get('/roles/r1').content)['name'], 'Reader')
+        self.assertEqual(self.cluster.requests, [])
+
+
+if __name__ == '__main__':
+    unittest.main()